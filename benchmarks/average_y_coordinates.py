@@ -0,0 +1,78 @@
+"""Compare TableSplitter.average_y_coordinates with the routine it replaced.
+
+Run from the repository root:
+
+    python benchmarks/average_y_coordinates.py
+"""
+
+import os
+import random
+import sys
+import timeit
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_parser.tables import TableSplitter
+
+
+def legacy_average_y_coordinates(y_coordinates: List[float]) -> List[float]:
+    threshold = 0.01
+    averaged_y_coordinates = []
+    while y_coordinates:
+        current_value = y_coordinates.pop(0)
+        close_values = [current_value]
+
+        # Check for values within 0.01
+        for value in y_coordinates:
+            if abs(value - current_value) < threshold:
+                close_values.append(value)
+                y_coordinates.remove(value)
+
+        # Calculate the average and add to the result
+        averaged_y_coordinates.append(sum(close_values) / len(close_values))
+
+    return averaged_y_coordinates
+
+
+def make_row_tops(number_of_rows: int, seed: int = 0) -> List[float]:
+    """Row tops as a long table produces them: a few words per row, with
+    small jitter around each row's baseline, sorted and de-duplicated. Rows
+    are 0.02 apart, so large inputs stand for tables spanning many pages."""
+    generator = random.Random(seed)
+    row_height = 0.02
+    values = set()
+    for row in range(number_of_rows):
+        for _ in range(3):
+            values.add(round(row * row_height + generator.uniform(0, 0.002), 6))
+    return sorted(values)
+
+
+def main() -> None:
+    table_splitter = TableSplitter({})
+    print(f"{'rows':>8} {'legacy (s)':>12} {'clustered (s)':>14} {'speedup':>8}")
+    for number_of_rows in (100, 1000, 5000):
+        values = make_row_tops(number_of_rows)
+        repeats = max(1, 20000 // number_of_rows)
+        legacy = (
+            timeit.timeit(
+                lambda values=values: legacy_average_y_coordinates(list(values)),
+                number=repeats,
+            )
+            / repeats
+        )
+        clustered = (
+            timeit.timeit(
+                lambda values=values: table_splitter.average_y_coordinates(values),
+                number=repeats,
+            )
+            / repeats
+        )
+        print(
+            f"{number_of_rows:>8} {legacy:>12.6f} {clustered:>14.6f} "
+            f"{legacy / clustered:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
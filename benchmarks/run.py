@@ -0,0 +1,285 @@
+"""Time the extraction, line sampling, table splitting and OCR hot paths.
+
+Every stage runs on synthetic PDFs generated offline, and reports its median
+and fastest time over --repeat runs plus its peak traced memory. Results can
+be saved as a baseline and later runs compared against it:
+
+    python benchmarks/run.py --pages 20 --save-baseline baseline.json
+    python benchmarks/run.py --pages 20 --compare baseline.json
+
+Comparing exits with status 1 when a stage is slower, or uses more memory,
+than the baseline by more than --tolerance. Line colours are sampled from
+rendered pages, which needs poppler, unless --line-colour-mode is "vector".
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import make_pdf, make_template, render_jpgs  # noqa: E402
+
+from pdf_parser.coordinate_utils import CoordinateUtils  # noqa: E402
+from pdf_parser.extractors import (  # noqa: E402
+    DataExtractor,
+    ImageExtractor,
+    TextExtractor,
+)
+from pdf_parser.ocr import PytesseractEngine  # noqa: E402
+from pdf_parser.parser import Parser  # noqa: E402
+from pdf_parser.raster import PageRaster  # noqa: E402
+from pdf_parser.tables import TableSplitter  # noqa: E402
+from pdf_parser.template import CompiledTemplate  # noqa: E402
+
+
+class BenchmarkContext:
+    """The synthetic inputs shared by all stages, built once per run."""
+
+    def __init__(self, parameters: Dict[str, Any]) -> None:
+        self.parameters = parameters
+        self.pdf_bytes = make_pdf(
+            pages=parameters["pages"],
+            words_per_page=parameters["words_per_page"],
+            lines_per_page=parameters["lines_per_page"],
+            table_rows=parameters["table_rows"],
+        )
+        line_colour_mode = parameters["line_colour_mode"]
+        self.template = CompiledTemplate(
+            make_template(line_colour_mode=line_colour_mode)
+        )
+        self.line_template = CompiledTemplate(
+            make_template(row_delimiter="line", line_colour_mode=line_colour_mode)
+        )
+        # Extracted for the line template, so lines have their colours
+        self.pdf_data = DataExtractor(self.pdf_bytes).extract_data(
+            template=self.line_template
+        )
+        self.first_page_jpg = render_jpgs(self.pdf_bytes)[0]
+        self.first_page_lines = [
+            line["decimal_coordinates"] for line in self.pdf_data["pages"][0]["lines"]
+        ]
+        self.cell_boxes = [
+            box
+            for column in self.template.get_rule("transactions")["config"]["columns"]
+            for box in TableSplitter(self.template).split_bounding_box_by_lines(
+                column["coordinates"],
+                [
+                    word["bounding_box"]["decimal_coordinates"]["top_left"]["y"]
+                    for word in self.pdf_data["pages"][0]["content"]
+                ],
+            )
+        ]
+        self.row_tops = [
+            word["bounding_box"]["decimal_coordinates"]["top_left"]["y"] + page_index
+            for page_index, page in enumerate(self.pdf_data["pages"])
+            for word in page["content"]
+        ]
+
+
+def extract_data(context: BenchmarkContext) -> None:
+    DataExtractor(context.pdf_bytes).extract_data(template=context.template)
+
+
+def extract_data_compact(context: BenchmarkContext) -> None:
+    DataExtractor(context.pdf_bytes).extract_data(
+        compact=True, template=context.template
+    )
+
+
+def extract_data_line_colours(context: BenchmarkContext) -> None:
+    DataExtractor(context.pdf_bytes).extract_data(template=context.line_template)
+
+
+def calculate_average_pixel_value(context: BenchmarkContext) -> None:
+    image_extractor = ImageExtractor(context.first_page_jpg)
+    for coordinates in context.first_page_lines:
+        image_extractor.calculate_average_pixel_value(
+            context.first_page_jpg, coordinates
+        )
+
+
+def page_raster_average_pixel_values(context: BenchmarkContext) -> None:
+    PageRaster.from_jpg_bytes(context.first_page_jpg).average_pixel_values(
+        context.first_page_lines
+    )
+
+
+def get_items_in_bounding_box(context: BenchmarkContext) -> None:
+    # A fresh instance, so each page's index is built as in a fresh parse
+    coordinate_utils = CoordinateUtils()
+    for page in context.pdf_data["pages"]:
+        for box in context.cell_boxes:
+            coordinate_utils.get_indexed_items_in_bounding_box(page["content"], box)
+
+
+def average_y_coordinates(context: BenchmarkContext) -> None:
+    TableSplitter(context.template).average_y_coordinates(context.row_tops)
+
+
+def parse_field_delimited_table(context: BenchmarkContext) -> None:
+    Parser().parse_data(context.template, context.pdf_data, [])
+
+
+def parse_line_delimited_table(context: BenchmarkContext) -> None:
+    Parser().parse_data(context.line_template, context.pdf_data, [])
+
+
+def ocr_cells(context: BenchmarkContext) -> None:
+    # An uncached in-process engine, so every run OCRs every crop
+    text_extractor = TextExtractor(CoordinateUtils(), PytesseractEngine())
+    text_extractor.get_texts_from_ocr(context.first_page_jpg, context.cell_boxes)
+
+
+STAGES: Dict[str, Callable[[BenchmarkContext], None]] = {
+    "extract_data": extract_data,
+    "extract_data_compact": extract_data_compact,
+    "extract_data_line_colours": extract_data_line_colours,
+    "calculate_average_pixel_value": calculate_average_pixel_value,
+    "page_raster_average_pixel_values": page_raster_average_pixel_values,
+    "get_items_in_bounding_box": get_items_in_bounding_box,
+    "average_y_coordinates": average_y_coordinates,
+    "parse_field_delimited_table": parse_field_delimited_table,
+    "parse_line_delimited_table": parse_line_delimited_table,
+    "ocr_cells": ocr_cells,
+}
+
+
+def get_skip_reason(stage_name: str) -> Optional[str]:
+    if stage_name == "ocr_cells" and shutil.which("tesseract") is None:
+        return "tesseract is not installed"
+    return None
+
+
+def run_stage(
+    stage: Callable[[BenchmarkContext], None], context: BenchmarkContext, repeat: int
+) -> Dict[str, float]:
+    """Time a stage repeat times, then run it once more to trace its peak
+    memory, since tracing slows it down."""
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        stage(context)
+        timings.append(time.perf_counter() - started_at)
+
+    tracemalloc.start()
+    try:
+        stage(context)
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "median_seconds": statistics.median(timings),
+        "min_seconds": min(timings),
+        "peak_bytes": peak_bytes,
+    }
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """Describe each stage that regressed against the baseline."""
+    if baseline["parameters"] != results["parameters"]:
+        print(
+            f"Warning: baseline parameters {baseline['parameters']} differ from "
+            f"{results['parameters']}"
+        )
+    regressions = []
+    print(f"\n{'stage':<34} {'time':>8} {'memory':>8}")
+    for stage_name, result in results["stages"].items():
+        baseline_result = baseline["stages"].get(stage_name)
+        if (
+            baseline_result is None
+            or "skipped" in result
+            or "skipped" in baseline_result
+        ):
+            continue
+        time_ratio = result["median_seconds"] / baseline_result["median_seconds"]
+        memory_ratio = result["peak_bytes"] / max(baseline_result["peak_bytes"], 1)
+        print(f"{stage_name:<34} {time_ratio:>7.2f}x {memory_ratio:>7.2f}x")
+        if time_ratio > 1 + tolerance:
+            regressions.append(f"{stage_name} is {time_ratio:.2f}x slower")
+        if memory_ratio > 1 + tolerance:
+            regressions.append(f"{stage_name} uses {memory_ratio:.2f}x more memory")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argument_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    argument_parser.add_argument("--pages", type=int, default=10)
+    argument_parser.add_argument("--words-per-page", type=int, default=300)
+    argument_parser.add_argument("--lines-per-page", type=int, default=30)
+    argument_parser.add_argument("--table-rows", type=int, default=30)
+    argument_parser.add_argument("--repeat", type=int, default=5)
+    argument_parser.add_argument(
+        "--stages", nargs="+", choices=sorted(STAGES), help="Stages to run"
+    )
+    argument_parser.add_argument("--save-baseline", help="Write results to this file")
+    argument_parser.add_argument("--compare", help="Baseline file to compare with")
+    argument_parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed slowdown or memory growth, as a fraction of the baseline",
+    )
+    argument_parser.add_argument(
+        "--line-colour-mode",
+        choices=["raster", "vector"],
+        default="raster",
+        help="Where line colours come from, as in a template's line_colour_mode",
+    )
+    arguments = argument_parser.parse_args(argv)
+    if arguments.line_colour_mode == "raster" and shutil.which("pdftoppm") is None:
+        argument_parser.error(
+            "raster line colours need poppler's pdftoppm, install it or pass "
+            "--line-colour-mode vector"
+        )
+
+    parameters = {
+        "pages": arguments.pages,
+        "words_per_page": arguments.words_per_page,
+        "lines_per_page": arguments.lines_per_page,
+        "table_rows": arguments.table_rows,
+        "line_colour_mode": arguments.line_colour_mode,
+    }
+    context = BenchmarkContext(parameters)
+    results: Dict[str, Any] = {"parameters": parameters, "stages": {}}
+
+    print(f"{'stage':<34} {'median (s)':>11} {'min (s)':>9} {'peak (MB)':>10}")
+    for stage_name in arguments.stages or STAGES:
+        skip_reason = get_skip_reason(stage_name)
+        if skip_reason is not None:
+            results["stages"][stage_name] = {"skipped": skip_reason}
+            print(f"{stage_name:<34} skipped: {skip_reason}")
+            continue
+        result = run_stage(STAGES[stage_name], context, arguments.repeat)
+        results["stages"][stage_name] = result
+        print(
+            f"{stage_name:<34} {result['median_seconds']:>11.5f} "
+            f"{result['min_seconds']:>9.5f} {result['peak_bytes'] / 1e6:>10.2f}"
+        )
+
+    if arguments.save_baseline:
+        with open(arguments.save_baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+
+    if arguments.compare:
+        with open(arguments.compare) as baseline_file:
+            regressions = compare(
+                results, json.load(baseline_file), arguments.tolerance
+            )
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
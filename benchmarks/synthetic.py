@@ -0,0 +1,146 @@
+"""Synthetic statement PDFs and templates for the benchmarks, built offline
+with PyMuPDF."""
+
+import random
+from typing import Any, Dict, List
+
+import pymupdf
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+TABLE_TOP = 120
+TABLE_BOTTOM = 800
+COLUMNS = [("date", 40, 110), ("description", 130, 400), ("amount", 440, 560)]
+WORDS = ["Payment", "to", "shop", "Transfer", "from", "card", "Direct", "Debit"]
+WORDS_PER_FILLER_LINE = 15
+FILLER_LINE_POSITIONS = [
+    (x, y)
+    for y in [78 + 4.5 * line for line in range(7)]
+    + [808 + 4.5 * line for line in range(7)]
+    for x in (40, 300)
+]
+MAX_FILLER_WORDS = WORDS_PER_FILLER_LINE * len(FILLER_LINE_POSITIONS)
+
+
+def make_pdf(
+    pages: int = 10,
+    words_per_page: int = 300,
+    lines_per_page: int = 30,
+    table_rows: int = 30,
+    seed: int = 0,
+) -> bytes:
+    """A statement with a header, a transaction table and ruled lines.
+
+    Each table row has five words, and the rest of words_per_page, up to
+    MAX_FILLER_WORDS, is filler text. Lines are spread over the table,
+    alternating between black and light grey.
+    """
+    generator = random.Random(seed)
+    document = pymupdf.open()
+    row_height = (TABLE_BOTTOM - TABLE_TOP) / max(table_rows, 1)
+    for page_number in range(pages):
+        page = document.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        page.insert_text((40, 50), f"ACME BANK Statement page {page_number + 1}")
+        page.insert_text((40, 70), "Account Number 12345678", fontsize=9)
+        for field_name, x0, _ in COLUMNS:
+            page.insert_text((x0, TABLE_TOP - 8), field_name.title(), fontsize=9)
+
+        words_left = words_per_page
+        for row in range(table_rows):
+            y = TABLE_TOP + row * row_height + 10
+            description = " ".join(generator.choice(WORDS) for _ in range(3))
+            page.insert_text((40, y), f"{row % 28 + 1:02d}/01", fontsize=8)
+            page.insert_text((130, y), description, fontsize=8)
+            page.insert_text((440, y), f"{generator.random() * 1000:.2f}", fontsize=8)
+            words_left -= 5
+
+        # Filler text goes in small print above and below the table, and is
+        # capped at the space there
+        filler_words = [
+            generator.choice(WORDS)
+            for _ in range(min(max(words_left, 0), MAX_FILLER_WORDS))
+        ]
+        for line_index, start in enumerate(
+            range(0, len(filler_words), WORDS_PER_FILLER_LINE)
+        ):
+            x, y = FILLER_LINE_POSITIONS[line_index]
+            text = " ".join(filler_words[start : start + WORDS_PER_FILLER_LINE])
+            page.insert_text((x, y), text, fontsize=4)
+
+        line_spacing = (TABLE_BOTTOM - TABLE_TOP) / max(lines_per_page, 1)
+        for line_index in range(lines_per_page):
+            y = TABLE_TOP + line_index * line_spacing
+            colour = (0, 0, 0) if line_index % 2 == 0 else (0.8, 0.8, 0.8)
+            page.draw_line((30, y), (570, y), color=colour, width=0.7)
+    return document.tobytes()
+
+
+def render_jpgs(pdf_bytes: bytes, dpi: int = 200) -> List[bytes]:
+    """Render each page to JPEG bytes without poppler."""
+    document = pymupdf.open(stream=pdf_bytes, filetype="pdf")
+    return [page.get_pixmap(dpi=dpi).tobytes("jpg") for page in document]
+
+
+def make_template(
+    row_delimiter: str = "field",
+    extraction_method: str = "extraction",
+    continuation: bool = False,
+    line_colour_mode: str = "raster",
+) -> Dict[str, Any]:
+    """A template for make_pdf documents: two forms and the transaction table
+    on every page."""
+    table_config: Dict[str, Any] = {
+        "columns": [
+            {
+                "field_name": field_name,
+                "coordinates": {
+                    "top_left": {"x": x0 / PAGE_WIDTH, "y": TABLE_TOP / PAGE_HEIGHT},
+                    "bottom_right": {
+                        "x": x1 / PAGE_WIDTH,
+                        "y": TABLE_BOTTOM / PAGE_HEIGHT,
+                    },
+                },
+            }
+            for field_name, x0, x1 in COLUMNS
+        ],
+        "row_delimiter": {
+            "type": row_delimiter,
+            "field_name": "date",
+            "max_pixel_value": 100,
+        },
+    }
+    if continuation:
+        table_config["continuation"] = {}
+    return {
+        "metadata": {"template_name": "synthetic", "version": "1"},
+        "extraction_method": extraction_method,
+        "line_colour_mode": line_colour_mode,
+        "rules": [
+            {
+                "rule_id": "account",
+                "type": "form",
+                "config": {
+                    "field_name": "account",
+                    "search_type": "coordinates",
+                    "coordinates": {
+                        "top_left": {"x": 0.05, "y": 0.07},
+                        "bottom_right": {"x": 0.5, "y": 0.09},
+                    },
+                },
+            },
+            {
+                "rule_id": "account_number",
+                "type": "form",
+                "config": {
+                    "field_name": "account_number",
+                    "search_type": "regex",
+                    "regex": "Account Number (\\d+)",
+                },
+            },
+            {"rule_id": "transactions", "type": "table", "config": table_config},
+        ],
+        "pages": [
+            {"page_numbers": "1", "forms": ["account", "account_number"]},
+            {"page_numbers": "1:-1", "tables": ["transactions"]},
+        ],
+    }
@@ -0,0 +1,282 @@
+import argparse
+import json
+import os
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from pdf_parser.ocr import CachedOcrEngine, get_local_ocr_engine
+from pdf_parser.parser import ParserSession
+from pdf_parser.streaming import JsonLinesWriter
+from pdf_parser.template import CompiledTemplate, load_templates
+
+
+class BatchJob:
+    """A PDF on disk and the id of the template to parse it with."""
+
+    def __init__(self, source: str, template_id: str) -> None:
+        self.source = source
+        self.template_id = template_id
+
+    @staticmethod
+    def from_directory(directory: str, template_id: str) -> List["BatchJob"]:
+        """A job for every PDF under a directory, in path order."""
+        sources = []
+        for root, _, file_names in os.walk(directory):
+            for file_name in file_names:
+                if file_name.lower().endswith(".pdf"):
+                    sources.append(os.path.join(root, file_name))
+        return [BatchJob(source, template_id) for source in sorted(sources)]
+
+    @staticmethod
+    def from_manifest(path: str) -> List["BatchJob"]:
+        """Jobs from a JSON Lines manifest of {"path": ..., "template_id": ...}.
+
+        Relative paths are resolved against the manifest's directory.
+        """
+        base_directory = os.path.dirname(os.path.abspath(path))
+        jobs = []
+        with open(path, encoding="utf-8") as manifest:
+            for line in manifest:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                jobs.append(
+                    BatchJob(
+                        os.path.join(base_directory, entry["path"]),
+                        entry["template_id"],
+                    )
+                )
+        return jobs
+
+
+class DocumentTimeout(BaseException):
+    # Not an Exception, so the libraries a parse runs through cannot catch and
+    # wrap it
+    pass
+
+
+# Warm state of each batch worker process, set up once by _initialise_worker
+_worker_sessions: Dict[str, ParserSession] = {}
+
+
+def _initialise_worker(templates: Dict[str, CompiledTemplate]) -> None:
+    # Each worker OCRs in its own process, since the batch pool is already
+    # using every core
+    ocr_engine = CachedOcrEngine(get_local_ocr_engine())
+    for template_id, template in templates.items():
+        _worker_sessions[template_id] = ParserSession(template, ocr_engine)
+
+
+def _raise_timeout(signum: int, frame: Any) -> None:
+    raise DocumentTimeout()
+
+
+def _parse_job(source: str, template_id: str, timeout: Optional[float]) -> Dict:
+    started_at = time.perf_counter()
+    record: Dict[str, Any] = {"source": source, "template_id": template_id}
+    if timeout:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        with open(source, "rb") as pdf_file:
+            pdf_bytes = pdf_file.read()
+        record["result"] = json.loads(_worker_sessions[template_id].parse(pdf_bytes))
+        record["status"] = "ok"
+    except DocumentTimeout:
+        record["status"] = "timeout"
+        record["error"] = f"Parsing took longer than {timeout} seconds"
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        if timeout:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    record["seconds"] = round(time.perf_counter() - started_at, 3)
+    return record
+
+
+class BatchProcessor:
+    """Parses many PDFs across a pool of worker processes.
+
+    Every worker compiles the templates and starts its OCR engine once, then
+    parses documents with them until the batch is done. At most max_in_flight
+    documents are queued or being parsed at a time, so memory stays bounded
+    however many jobs there are. Each result is written as one line to a JSON
+    Lines file as soon as it is done, and jobs whose source already has a line
+    in that file are skipped, so an interrupted batch can be run again to
+    resume it.
+    """
+
+    def __init__(
+        self,
+        templates: Dict[str, CompiledTemplate],
+        workers: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        timeout: Optional[float] = None,
+        max_tasks_per_child: Optional[int] = None,
+    ) -> None:
+        self.templates = templates
+        self.workers = workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or self.workers * 2
+        self.timeout = timeout
+        self.max_tasks_per_child = max_tasks_per_child
+
+    def create_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_initialise_worker,
+            initargs=(self.templates,),
+            max_tasks_per_child=self.max_tasks_per_child,
+        )
+
+    @staticmethod
+    def read_completed_sources(output_path: str, retry_failed: bool = False) -> Set:
+        """Sources that already have a result line in the output file.
+
+        A line cut short by a crash is ignored, so its source is parsed again.
+        """
+        completed: Set[str] = set()
+        if not os.path.exists(output_path):
+            return completed
+        with open(output_path, encoding="utf-8") as output_file:
+            for line in output_file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("status") == "ok" or not retry_failed:
+                    completed.add(record["source"])
+        return completed
+
+    def run(
+        self, jobs: Iterable[BatchJob], output_path: str, retry_failed: bool = False
+    ) -> Dict[str, int]:
+        """Parse every job not already in the output file, appending a line for
+        each. Returns the number of results by status."""
+        completed = self.read_completed_sources(output_path, retry_failed)
+        summary = {"skipped": 0, "ok": 0, "error": 0, "timeout": 0}
+        pending_jobs = []
+        for job in jobs:
+            if job.source in completed:
+                summary["skipped"] += 1
+            elif job.template_id not in self.templates:
+                raise KeyError(f"Template '{job.template_id}' not found")
+            else:
+                pending_jobs.append(job)
+
+        with JsonLinesWriter(output_path) as writer:
+            for record in self.iter_results(pending_jobs):
+                writer.write(record)
+                summary[record["status"]] += 1
+        return summary
+
+    def iter_results(self, jobs: List[BatchJob]) -> Iterator[Dict[str, Any]]:
+        """Yield a result record for each job, in the order they finish.
+
+        When a worker dies, for example killed for running out of memory,
+        every job in flight fails with it. The pool is restarted and those
+        jobs are parsed again one at a time, so only the job that kills a
+        worker on its own is recorded as failed.
+        """
+        remaining = iter(jobs)
+        suspects: List[BatchJob] = []
+        pool = self.create_pool()
+        in_flight: Dict[Future, BatchJob] = {}
+        try:
+            while True:
+                isolated = bool(suspects)
+                if isolated:
+                    job = suspects.pop(0)
+                    in_flight[self._submit(pool, job)] = job
+                while not isolated and len(in_flight) < self.max_in_flight:
+                    job = next(remaining, None)
+                    if job is None:
+                        break
+                    in_flight[self._submit(pool, job)] = job
+                if not in_flight:
+                    return
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                broken = False
+                for future in done:
+                    job = in_flight.pop(future)
+                    try:
+                        yield future.result()
+                    except BrokenProcessPool as e:
+                        broken = True
+                        if not isolated:
+                            suspects.append(job)
+                            continue
+                        yield {
+                            "source": job.source,
+                            "template_id": job.template_id,
+                            "status": "error",
+                            "error": f"{type(e).__name__}: {e}",
+                        }
+                if broken:
+                    suspects.extend(in_flight.values())
+                    in_flight.clear()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = self.create_pool()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _submit(self, pool: ProcessPoolExecutor, job: BatchJob) -> Future:
+        return pool.submit(_parse_job, job.source, job.template_id, self.timeout)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argument_parser = argparse.ArgumentParser(
+        description="Parse a batch of PDFs with templates."
+    )
+    sources = argument_parser.add_mutually_exclusive_group(required=True)
+    sources.add_argument("--input-dir", help="Directory of PDFs to parse")
+    sources.add_argument(
+        "--manifest",
+        help='JSON Lines file of {"path": ..., "template_id": ...} entries',
+    )
+    argument_parser.add_argument(
+        "--templates", required=True, help="Directory of template JSON files"
+    )
+    argument_parser.add_argument(
+        "--template-id", help="Template for every PDF in --input-dir"
+    )
+    argument_parser.add_argument(
+        "--output", required=True, help="JSON Lines file to append results to"
+    )
+    argument_parser.add_argument("--workers", type=int)
+    argument_parser.add_argument("--max-in-flight", type=int)
+    argument_parser.add_argument(
+        "--timeout", type=float, help="Seconds allowed for each document"
+    )
+    argument_parser.add_argument("--max-tasks-per-child", type=int)
+    argument_parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="Parse again documents that failed or timed out in an earlier run",
+    )
+    arguments = argument_parser.parse_args(argv)
+
+    if arguments.input_dir:
+        if not arguments.template_id:
+            argument_parser.error("--template-id is required with --input-dir")
+        jobs = BatchJob.from_directory(arguments.input_dir, arguments.template_id)
+    else:
+        jobs = BatchJob.from_manifest(arguments.manifest)
+
+    batch_processor = BatchProcessor(
+        load_templates(arguments.templates),
+        workers=arguments.workers,
+        max_in_flight=arguments.max_in_flight,
+        timeout=arguments.timeout,
+        max_tasks_per_child=arguments.max_tasks_per_child,
+    )
+    summary = batch_processor.run(jobs, arguments.output, arguments.retry_failed)
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,211 @@
-from typing import Dict, List, Any
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from pdf_parser.template import CompiledTemplate
+
+
+class SpatialIndex:
+    """Index of item bounding boxes sorted by their top y decimal coordinate.
+
+    A box query binary searches the band of items whose top edge can satisfy the
+    containment test and only checks the remaining edges for that band.
+    """
+
+    def __init__(
+        self, x0: np.ndarray, y0: np.ndarray, x1: np.ndarray, y1: np.ndarray
+    ) -> None:
+        # Items whose bottom edge is above their top edge cannot be bounded by
+        # the band search, so they are always checked directly.
+        regular = y1 >= y0
+        self.irregular_indexes = np.flatnonzero(~regular)
+        regular_indexes = np.flatnonzero(regular)
+        order = regular_indexes[np.argsort(y0[regular], kind="stable")]
+        self.sorted_indexes = order
+        self.sorted_top = y0[order]
+        self.x0 = x0
+        self.y0 = y0
+        self.x1 = x1
+        self.y1 = y1
+
+    @classmethod
+    def from_items(cls, items: List[Dict[str, Any]]) -> "SpatialIndex":
+        coordinates = np.array(
+            [
+                [
+                    box["top_left"]["x"],
+                    box["top_left"]["y"],
+                    box["bottom_right"]["x"],
+                    box["bottom_right"]["y"],
+                ]
+                for box in (
+                    item["bounding_box"]["decimal_coordinates"] for item in items
+                )
+            ],
+            dtype=np.float64,
+        ).reshape(-1, 4)
+        return cls(*coordinates.T)
+
+    def __len__(self) -> int:
+        return len(self.x0)
+
+    def query(
+        self, box_coordinates: Dict[str, Dict[str, float]], threshold: float = 0.005
+    ) -> np.ndarray:
+        """Return the indexes, in original order, of items inside the box."""
+        left = box_coordinates["top_left"]["x"] - threshold
+        top = box_coordinates["top_left"]["y"] - threshold
+        right = box_coordinates["bottom_right"]["x"] + threshold
+        bottom = box_coordinates["bottom_right"]["y"] + threshold
+
+        start = np.searchsorted(self.sorted_top, top, side="left")
+        stop = np.searchsorted(self.sorted_top, bottom, side="right")
+        candidates = self.sorted_indexes[start:stop]
+        if len(self.irregular_indexes):
+            irregular = self.irregular_indexes[self.y0[self.irregular_indexes] >= top]
+            candidates = np.concatenate([candidates, irregular])
+
+        mask = (
+            (self.x0[candidates] >= left)
+            & (self.x1[candidates] <= right)
+            & (self.y1[candidates] <= bottom)
+        )
+        return np.sort(candidates[mask])
+
+
+# A page's item list and the index built from it
+CachedIndex = Tuple[List[Dict[str, Any]], SpatialIndex]
 
 
 class CoordinateUtils:
+    def __init__(self, max_spatial_indexes: int = 64) -> None:
+        # The index of each page's items, shared by everything that parses
+        # with this instance so a page is indexed once however many rules read
+        # it. Entries hold a reference to their item list so an id cannot be
+        # reused while it is cached, and the least recently used entries are
+        # dropped past max_spatial_indexes.
+        self.max_spatial_indexes = max_spatial_indexes
+        self.spatial_indexes: "OrderedDict[int, CachedIndex]" = OrderedDict()
+
     @staticmethod
     def get_rule_from_id(rule_id: str, template: Dict[str, Any]) -> Dict[str, Any]:
+        if isinstance(template, CompiledTemplate):
+            return template.get_rule(rule_id)
         return [item for item in template["rules"] if item["rule_id"] == rule_id][0]
 
+    @staticmethod
+    def build_spatial_index(text_coordinates: List[Dict[str, Any]]) -> SpatialIndex:
+        if isinstance(getattr(text_coordinates, "spatial_index", None), SpatialIndex):
+            # Columnar pages carry their own index
+            return text_coordinates.spatial_index  # type: ignore[attr-defined]
+        return SpatialIndex.from_items(text_coordinates)
+
+    def get_spatial_index(self, text_coordinates: List[Dict[str, Any]]) -> SpatialIndex:
+        """Get the spatial index for a page's items, building it on first use.
+        It is kept until the page is released, and rebuilt if items were added
+        or removed. Release the page after editing its items in place."""
+        if isinstance(getattr(text_coordinates, "spatial_index", None), SpatialIndex):
+            return self.build_spatial_index(text_coordinates)
+
+        key = id(text_coordinates)
+        cached = self.spatial_indexes.get(key)
+        if (
+            cached is not None
+            and cached[0] is text_coordinates
+            and len(cached[1]) == len(text_coordinates)
+        ):
+            self.spatial_indexes.move_to_end(key)
+            return cached[1]
+
+        spatial_index = self.build_spatial_index(text_coordinates)
+        self.spatial_indexes[key] = (text_coordinates, spatial_index)
+        self.spatial_indexes.move_to_end(key)
+        while len(self.spatial_indexes) > self.max_spatial_indexes:
+            self.spatial_indexes.popitem(last=False)
+        return spatial_index
+
+    def release_spatial_index(self, text_coordinates: List[Dict[str, Any]]) -> None:
+        """Forget the cached index for a page's items once the page is done."""
+        cached = self.spatial_indexes.get(id(text_coordinates))
+        if cached is not None and cached[0] is text_coordinates:
+            del self.spatial_indexes[id(text_coordinates)]
+
+    def clear_spatial_indexes(self) -> None:
+        """Forget every cached index once a document is done."""
+        self.spatial_indexes.clear()
+
+    @staticmethod
+    def merge_nearby_boxes(
+        boxes: List[Dict[str, Dict[str, float]]], gap: float
+    ) -> List[Dict[str, Dict[str, float]]]:
+        """Merge boxes less than gap apart into their bounding boxes, until no
+        two merged boxes are that close. Sorted top to bottom."""
+        merged = [
+            [
+                box["top_left"]["x"],
+                box["top_left"]["y"],
+                box["bottom_right"]["x"],
+                box["bottom_right"]["y"],
+            ]
+            for box in boxes
+        ]
+        changed = True
+        while changed:
+            changed = False
+            for first in range(len(merged)):
+                for second in range(first + 1, len(merged)):
+                    a, b = merged[first], merged[second]
+                    if (
+                        a[0] - gap < b[2]
+                        and b[0] - gap < a[2]
+                        and a[1] - gap < b[3]
+                        and b[1] - gap < a[3]
+                    ):
+                        merged[first] = [
+                            min(a[0], b[0]),
+                            min(a[1], b[1]),
+                            max(a[2], b[2]),
+                            max(a[3], b[3]),
+                        ]
+                        del merged[second]
+                        changed = True
+                        break
+                if changed:
+                    break
+        return [
+            {"top_left": {"x": x0, "y": y0}, "bottom_right": {"x": x1, "y": y1}}
+            for x0, y0, x1, y1 in sorted(merged, key=lambda box: (box[1], box[0]))
+        ]
+
     @staticmethod
     def get_items_in_bounding_box(
         text_coordinates: List[Dict[str, Any]],
         box_coordinates: Dict[str, Dict[str, float]],
         threshold: float = 0.005,
     ) -> List[Dict[str, Any]]:
-        items_in_box = []
-        for item in text_coordinates:
-            bounding_box = item["bounding_box"]["decimal_coordinates"]
-            if (
-                bounding_box["top_left"]["x"]
-                >= box_coordinates["top_left"]["x"] - threshold
-                and bounding_box["top_left"]["y"]
-                >= box_coordinates["top_left"]["y"] - threshold
-                and bounding_box["bottom_right"]["x"]
-                <= box_coordinates["bottom_right"]["x"] + threshold
-                and bounding_box["bottom_right"]["y"]
-                <= box_coordinates["bottom_right"]["y"] + threshold
-            ):
-                items_in_box.append(item)
-        return items_in_box
+        """Get the items inside a box, indexing the items for this query only."""
+        spatial_index = CoordinateUtils.build_spatial_index(text_coordinates)
+        return CoordinateUtils.get_items_from_indexes(
+            text_coordinates, spatial_index.query(box_coordinates, threshold)
+        )
+
+    def get_indexed_items_in_bounding_box(
+        self,
+        text_coordinates: List[Dict[str, Any]],
+        box_coordinates: Dict[str, Dict[str, float]],
+        threshold: float = 0.005,
+    ) -> List[Dict[str, Any]]:
+        """Get the items inside a box, reusing the page's cached index."""
+        spatial_index = self.get_spatial_index(text_coordinates)
+        return self.get_items_from_indexes(
+            text_coordinates, spatial_index.query(box_coordinates, threshold)
+        )
+
+    @staticmethod
+    def get_items_from_indexes(
+        text_coordinates: List[Dict[str, Any]], indexes: np.ndarray
+    ) -> List[Dict[str, Any]]:
+        if hasattr(text_coordinates, "to_items"):
+            return text_coordinates.to_items(indexes)
+        return [text_coordinates[index] for index in indexes]
@@ -0,0 +1,197 @@
+import io
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+import pdfplumber
+
+from pdf_parser.extractors import DataExtractor, ImageExtractor
+from pdf_parser.instrumentation import NO_INSTRUMENTATION, Instrumentation
+from pdf_parser.raster import (
+    PageRaster,
+    RasterStore,
+    RegionRasterSet,
+    RegionRenderer,
+    RenderProfile,
+)
+from pdf_parser.template import get_template_requirements
+
+
+class LazyPageSequence(Sequence):
+    """Read-only page sequence that loads each page on first access."""
+
+    def __init__(self, document: "LazyDocument", loader_name: str) -> None:
+        self.document = document
+        self.loader_name = loader_name
+
+    def __len__(self) -> int:
+        return self.document.number_of_pages
+
+    def __getitem__(self, page_index: Any) -> Any:
+        if isinstance(page_index, slice):
+            return [self[index] for index in range(*page_index.indices(len(self)))]
+        if page_index < 0:
+            page_index += len(self)
+        if not 0 <= page_index < len(self):
+            raise IndexError("page index out of range")
+        return getattr(self.document, self.loader_name)(page_index)
+
+    def __iter__(self) -> Iterator[Any]:
+        for page_index in range(len(self)):
+            yield self[page_index]
+
+
+class LazyDocument:
+    """A PDF whose pages are only extracted and rendered when they are used.
+
+    `pdf_data` and `jpg_bytes` can be passed to Parser.parse_pdf in place of the
+    output of DataExtractor.extract_data and convert_pdf_to_jpg_files. Pages the
+    template never reads are never extracted, and extracted pages are cached.
+    When a template is given, pages are only rendered if it OCRs text or
+    splits tables on line colours.
+
+    With a raster_store, pages are rendered into it and `jpg_bytes` holds
+    PageRasters instead of JPEG bytes, so they are never encoded and decoded
+    again.
+
+    `jpg_bytes` is rendered with the OCR render profile. When the line
+    sampling profile differs, lines are sampled from a separate raster
+    rendered with it, without JPEG encoding.
+
+    Pages in `ocr_regions`, a dict of page index to a list of decimal
+    coordinates, are only rendered inside those regions for OCR, as a
+    RegionRasterSet.
+    """
+
+    def __init__(
+        self,
+        pdf_bytes: bytes,
+        compact: bool = False,
+        template: Optional[Dict[str, Any]] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        raster_store: Optional[RasterStore] = None,
+        render_profiles: Optional[Dict[str, RenderProfile]] = None,
+    ) -> None:
+        self.pdf_bytes = pdf_bytes
+        self.raster_store = raster_store
+        self.compact = compact
+        self.instrumentation = instrumentation or NO_INSTRUMENTATION
+        requirements = get_template_requirements(template or {})
+        if template is None:
+            self.line_colour_mode = "raster"
+            self.render_line_colours = True
+        else:
+            self.line_colour_mode = requirements.line_colour_mode
+            self.render_line_colours = requirements.renders_line_colours
+        render_profiles = render_profiles or {}
+        self.line_sampling_profile = render_profiles.get(
+            "line_sampling", requirements.line_sampling_profile
+        )
+        self.ocr_profile = render_profiles.get("ocr", requirements.ocr_profile)
+        self.data_extractor = DataExtractor(pdf_bytes, self.instrumentation)
+        self.image_extractor = ImageExtractor(pdf_bytes)
+        self._pdf = pdfplumber.open(io.BytesIO(pdf_bytes))
+        self.number_of_pages = len(self._pdf.pages)
+        self._pages: Dict[int, Dict[str, Any]] = {}
+        self._jpg_bytes: Dict[int, bytes] = {}
+        self._line_rasters: Dict[int, PageRaster] = {}
+        self.ocr_regions: Dict[int, List[Dict[str, Dict[str, float]]]] = {}
+        self._region_rasters: Dict[int, RegionRasterSet] = {}
+        self._region_renderer: Optional[RegionRenderer] = None
+
+        self.pages = LazyPageSequence(self, "get_page")
+        self.jpg_bytes = LazyPageSequence(self, "get_jpg_bytes")
+        self.pdf_data: Dict[str, Any] = {
+            "pages": self.pages,
+            "number_of_pages": self.number_of_pages,
+            "dimensions": self.data_extractor.get_dimensions(self._pdf),
+        }
+
+    def __enter__(self) -> "LazyDocument":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._pdf.close()
+        if self.raster_store is not None:
+            self.raster_store.close()
+        if self._region_renderer is not None:
+            self._region_renderer.close()
+
+    def get_jpg_bytes(
+        self, page_index: int
+    ) -> Union[bytes, PageRaster, RegionRasterSet]:
+        """Render a single page to JPEG bytes, caching the result, or get its
+        raster from the raster store."""
+        if page_index in self.ocr_regions:
+            return self.get_region_raster(page_index)
+        if self.raster_store is not None:
+            with self.instrumentation.span("render", page=page_index + 1):
+                return self.raster_store.get(page_index)
+        if page_index not in self._jpg_bytes:
+            with self.instrumentation.span("render", page=page_index + 1):
+                jpg_files = self.image_extractor.convert_pdf_to_jpg_files(
+                    first_page=page_index + 1,
+                    last_page=page_index + 1,
+                    profile=self.ocr_profile,
+                )
+                self._jpg_bytes[page_index] = jpg_files[0]
+        return self._jpg_bytes[page_index]
+
+    def get_line_raster(self, page_index: int) -> Union[bytes, PageRaster]:
+        """Get the page image to sample line colours from, reusing the OCR
+        image when both profiles are the same."""
+        if (
+            self.line_sampling_profile == self.ocr_profile
+            and page_index not in self.ocr_regions
+        ):
+            return self.get_jpg_bytes(page_index)
+        if page_index not in self._line_rasters:
+            with self.instrumentation.span("render_lines", page=page_index + 1):
+                image = self.line_sampling_profile.render(
+                    self.pdf_bytes, first_page=page_index + 1, last_page=page_index + 1
+                )[0]
+                self._line_rasters[page_index] = PageRaster.from_image(
+                    image, grayscale=self.line_sampling_profile.grayscale
+                )
+        return self._line_rasters[page_index]
+
+    def get_region_raster(self, page_index: int) -> RegionRasterSet:
+        """Render only the page's OCR regions, caching the result."""
+        if page_index not in self._region_rasters:
+            if self._region_renderer is None:
+                self._region_renderer = RegionRenderer(self.pdf_bytes, self.ocr_profile)
+            with self.instrumentation.span("render_region", page=page_index + 1):
+                self._region_rasters[page_index] = self._region_renderer.render_regions(
+                    page_index, self.ocr_regions[page_index]
+                )
+        return self._region_rasters[page_index]
+
+    def get_page(self, page_index: int) -> Dict[str, Any]:
+        """Extract a single page's words and lines, caching the result."""
+        if page_index not in self._pages:
+            self._pages[page_index] = self.data_extractor.extract_page(
+                self._pdf.pages[page_index],
+                page_index,
+                self.get_line_raster(page_index) if self.render_line_colours else None,
+                self.compact,
+                self.line_colour_mode,
+            )
+        return self._pages[page_index]
+
+    def release_page(self, page_index: int) -> None:
+        """Free a page's extracted data and image. They are extracted and
+        rendered again if the page is used later."""
+        if self._pages.pop(page_index, None) is not None:
+            # pdfplumber keeps every parsed layout object of a page until it
+            # is closed
+            self._pdf.pages[page_index].close()
+        self._jpg_bytes.pop(page_index, None)
+        self._line_rasters.pop(page_index, None)
+        self._region_rasters.pop(page_index, None)
+        if self.raster_store is not None:
+            self.raster_store.release(page_index)
+
+    @property
+    def extracted_page_indexes(self) -> List[int]:
+        return sorted(self._pages)
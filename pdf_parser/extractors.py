@@ -1,48 +1,167 @@
 import io
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Tuple, Any, Optional, Union
 
 import numpy as np
 import pdfplumber
-import pytesseract  # type: ignore
-from pdf2image import convert_from_bytes
 from PIL import Image
 
+from pdf_parser.instrumentation import NO_INSTRUMENTATION, Instrumentation
+from pdf_parser.ocr import OcrEngine, get_default_ocr_engine
+from pdf_parser.page_model import ColumnarLines, ColumnarWords
+from pdf_parser.raster import PageRaster, RegionRasterSet, RenderProfile
+from pdf_parser.template import get_template_requirements
+
 
 class DataExtractor:
-    def __init__(self, pdf_bytes: bytes):
+    def __init__(
+        self, pdf_bytes: bytes, instrumentation: Optional[Instrumentation] = None
+    ):
         self.pdf_bytes = pdf_bytes
+        self.instrumentation = instrumentation or NO_INSTRUMENTATION
 
-    def extract_data(self) -> Dict[str, Any]:
+    def extract_data(
+        self,
+        compact: bool = False,
+        workers: int = 1,
+        template: Optional[Dict[str, Any]] = None,
+        line_colour_mode: Optional[str] = None,
+    ) -> Dict[str, Any]:
         """
         Extract text, bounding box information, and line coordinates from the PDF file.
 
+        Args:
+            compact: Store each page's words and lines as ColumnarWords and
+                ColumnarLines instead of lists of nested dicts.
+            workers: Number of processes to split the pages across. Each worker
+                opens the PDF itself and extracts a contiguous range of pages.
+            template: Template the data will be parsed with. When it never splits
+                tables on line colours the pages are not rendered, and lines are
+                returned without an average_pixel_value.
+            line_colour_mode: "raster" samples line colours from the rendered
+                page, "vector" reads each line's stroke colour from the PDF and
+                needs no rendering. Defaults to the template's line_colour_mode,
+                or "raster".
+
         Returns:
             dict: Dictionary containing extracted text, bounding box information, line coordinates, number of pages, and dimensions.
         """
-        pdf_jpg_files = ImageExtractor(self.pdf_bytes).convert_pdf_to_jpg_files()
-
+        if template is None:
+            line_colour_mode = line_colour_mode or "raster"
+            rasterize = line_colour_mode == "raster"
+            profile = RenderProfile()
+        else:
+            requirements = get_template_requirements(template)
+            line_colour_mode = line_colour_mode or requirements.line_colour_mode
+            rasterize = (
+                requirements.samples_line_colours and line_colour_mode == "raster"
+            )
+            profile = requirements.line_sampling_profile
         with pdfplumber.open(io.BytesIO(self.pdf_bytes)) as pdf:
             data: Dict[str, Any] = {
                 "pages": [],
                 "number_of_pages": len(pdf.pages),
                 "dimensions": self.get_dimensions(pdf),
             }
+            if workers > 1 and len(pdf.pages) > 1:
+                data["pages"] = self.extract_pages_in_parallel(
+                    len(pdf.pages),
+                    compact,
+                    workers,
+                    rasterize,
+                    line_colour_mode,
+                    profile,
+                )
+                return data
+
+            pdf_jpg_files: List[Optional[bytes]] = [None] * len(pdf.pages)
+            if rasterize:
+                with self.instrumentation.span("render"):
+                    pdf_jpg_files = list(
+                        ImageExtractor(self.pdf_bytes).convert_pdf_to_jpg_files(
+                            profile=profile
+                        )
+                    )
             for page_num, page in enumerate(pdf.pages):
-                page_data = self.extract_page_text_data(page)
-
-                line_data = self.extract_page_line_data(page, pdf_jpg_files[page_num])
-
                 data["pages"].append(
-                    {
-                        "page_number": page_num + 1,
-                        "content": page_data,
-                        "lines": line_data,
-                    }
+                    self.extract_page(
+                        page,
+                        page_num,
+                        pdf_jpg_files[page_num],
+                        compact,
+                        line_colour_mode,
+                    )
                 )
             return data
 
+    def extract_pages_in_parallel(
+        self,
+        number_of_pages: int,
+        compact: bool,
+        workers: int,
+        rasterize: bool = True,
+        line_colour_mode: str = "raster",
+        profile: Optional[RenderProfile] = None,
+    ) -> List[Dict[str, Any]]:
+        """Extract pages across a process pool, returning them in page order."""
+        chunk_size = -(-number_of_pages // workers)
+        page_ranges = [
+            (first_page, min(first_page + chunk_size - 1, number_of_pages))
+            for first_page in range(1, number_of_pages + 1, chunk_size)
+        ]
+        pages: List[Dict[str, Any]] = []
+        with ProcessPoolExecutor(max_workers=min(workers, len(page_ranges))) as pool:
+            for chunk in pool.map(
+                _extract_page_range,
+                [self.pdf_bytes] * len(page_ranges),
+                [first_page for first_page, _ in page_ranges],
+                [last_page for _, last_page in page_ranges],
+                [compact] * len(page_ranges),
+                [rasterize] * len(page_ranges),
+                [line_colour_mode] * len(page_ranges),
+                [profile] * len(page_ranges),
+            ):
+                pages.extend(chunk)
+        return pages
+
+    def extract_page(
+        self,
+        page: Any,
+        page_num: int,
+        jpg_bytes: Optional[Union[bytes, PageRaster]],
+        compact: bool = False,
+        line_colour_mode: str = "raster",
+    ) -> Dict[str, Any]:
+        """Extract the words and lines of a single page.
+
+        In "raster" mode line colours are only sampled when the page's JPEG
+        bytes or raster are given.
+        """
+        page_raster = (
+            None if jpg_bytes is None else PageRaster.from_page_image(jpg_bytes)
+        )
+        page_data: Union[List[Dict[str, Any]], ColumnarWords]
+        line_data: Union[List[Dict[str, Any]], ColumnarLines]
+        with self.instrumentation.span("extract_words", page=page_num + 1):
+            if compact:
+                page_data = ColumnarWords.from_page(page)
+            else:
+                page_data = self.extract_page_text_data(page)
+        with self.instrumentation.span("extract_lines", page=page_num + 1):
+            line_data = self.extract_page_line_data(page, page_raster, line_colour_mode)
+            if compact:
+                line_data = ColumnarLines.from_items(line_data)
+        self.instrumentation.count("words", len(page_data))
+        self.instrumentation.count("lines", len(line_data))
+
+        return {
+            "page_number": page_num + 1,
+            "content": page_data,
+            "lines": line_data,
+        }
+
     def get_dimensions(self, pdf: Any) -> Dict[str, float]:
         """Get the dimensions of the first page of the PDF."""
         return {
@@ -50,41 +169,113 @@ class DataExtractor:
             "height": round(pdf.pages[0].height, 2),
         }
 
+    @staticmethod
+    def convert_stroke_colour_to_rgb(colour: Any) -> Optional[List[int]]:
+        """Convert a pdfplumber stroke colour (gray, RGB or CMYK) to 0-255 RGB.
+
+        Returns None for colours that cannot be converted, such as patterns.
+        """
+        if colour is None:
+            # The PDF default stroke colour is black
+            return [0, 0, 0]
+        if isinstance(colour, (int, float)):
+            colour = (colour,)
+        if not isinstance(colour, (tuple, list)) or not all(
+            isinstance(component, (int, float)) for component in colour
+        ):
+            return None
+
+        if len(colour) == 1:
+            red = green = blue = colour[0]
+        elif len(colour) == 3:
+            red, green, blue = colour
+        elif len(colour) == 4:
+            cyan, magenta, yellow, black = colour
+            red = (1 - cyan) * (1 - black)
+            green = (1 - magenta) * (1 - black)
+            blue = (1 - yellow) * (1 - black)
+        else:
+            return None
+        return [int(round(min(max(value, 0), 1) * 255)) for value in (red, green, blue)]
+
     def extract_page_line_data(
-        self, page: Any, jpg_bytes: bytes
+        self,
+        page: Any,
+        page_raster: Optional[Union[bytes, PageRaster]],
+        line_colour_mode: str = "raster",
     ) -> List[Dict[str, Any]]:
-        """Extract line data from a page."""
-        image_extractor = ImageExtractor(self.pdf_bytes)
-        line_data: List[Dict[str, Any]] = []
+        """Extract line data from a page, sampling all lines from one raster.
+
+        In "vector" mode the colour comes from each line's stroke colour, and the
+        raster is only sampled for lines whose colour cannot be converted. With
+        no raster those lines are returned without an average_pixel_value, so
+        their colour is unknown rather than guessed.
+        """
+        if isinstance(page_raster, bytes):
+            page_raster = PageRaster.from_jpg_bytes(page_raster)
+
+        line_coordinates: List[Dict[str, Dict[str, float]]] = []
+        stroke_colours: List[Optional[List[int]]] = []
         for line in page.lines:
             # Ensure line has the necessary keys before proceeding
             if "x0" in line and "y0" in line and "x1" in line and "y1" in line:
-                coordinates = {
-                    "top_left": {
-                        "x": round(line["x0"] / page.width, 6),
-                        "y": round(1 - (line["y0"] / page.height), 6),
-                    },
-                    "bottom_right": {
-                        "x": round(line["x1"] / page.width, 6),
-                        "y": round(1 - (line["y1"] / page.height), 6),
-                    },
-                }
-                (
-                    average_pixel_value,
-                    _,
-                    _,
-                    _,
-                ) = image_extractor.calculate_average_pixel_value(
-                    jpg_bytes,
-                    coordinates,
-                )
-                line_data.append(
+                line_coordinates.append(
                     {
-                        "decimal_coordinates": coordinates,
-                        "average_pixel_value": average_pixel_value,
+                        "top_left": {
+                            "x": round(line["x0"] / page.width, 6),
+                            "y": round(1 - (line["y0"] / page.height), 6),
+                        },
+                        "bottom_right": {
+                            "x": round(line["x1"] / page.width, 6),
+                            "y": round(1 - (line["y1"] / page.height), 6),
+                        },
                     }
                 )
-        return line_data
+                stroke_colours.append(
+                    self.convert_stroke_colour_to_rgb(line.get("stroking_color"))
+                )
+
+        if line_colour_mode == "vector":
+            unconverted = [
+                coordinates
+                for coordinates, colour in zip(line_coordinates, stroke_colours)
+                if colour is None
+            ]
+            sampled = iter(
+                page_raster.average_pixel_values(unconverted)
+                if page_raster is not None
+                else [None] * len(unconverted)
+            )
+            lines: List[Dict[str, Any]] = []
+            for coordinates, colour in zip(line_coordinates, stroke_colours):
+                if colour is None:
+                    colour = next(sampled)
+                if colour is None:
+                    lines.append({"decimal_coordinates": coordinates})
+                else:
+                    lines.append(
+                        {
+                            "decimal_coordinates": coordinates,
+                            "average_pixel_value": colour,
+                        }
+                    )
+            return lines
+
+        if page_raster is None:
+            return [
+                {"decimal_coordinates": coordinates} for coordinates in line_coordinates
+            ]
+
+        average_pixel_values = page_raster.average_pixel_values(line_coordinates)
+        return [
+            {
+                "decimal_coordinates": coordinates,
+                "average_pixel_value": average_pixel_value,
+            }
+            for coordinates, average_pixel_value in zip(
+                line_coordinates, average_pixel_values
+            )
+        ]
 
     def extract_page_text_data(self, page: Any) -> List[Dict[str, Any]]:
         """Extract text and bounding box information from a page."""
@@ -121,26 +312,91 @@ class DataExtractor:
         return page_data
 
 
+def _extract_page_range(
+    pdf_bytes: bytes,
+    first_page: int,
+    last_page: int,
+    compact: bool,
+    rasterize: bool,
+    line_colour_mode: str,
+    profile: Optional[RenderProfile] = None,
+) -> List[Dict[str, Any]]:
+    """Extract pages first_page to last_page (inclusive, from 1) in a worker process."""
+    data_extractor = DataExtractor(pdf_bytes)
+    pdf_jpg_files: List[Optional[bytes]] = [None] * (last_page - first_page + 1)
+    if rasterize:
+        pdf_jpg_files = list(
+            ImageExtractor(pdf_bytes).convert_pdf_to_jpg_files(
+                first_page=first_page, last_page=last_page, profile=profile
+            )
+        )
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        return [
+            data_extractor.extract_page(
+                pdf.pages[page_num], page_num, jpg_bytes, compact, line_colour_mode
+            )
+            for page_num, jpg_bytes in zip(
+                range(first_page - 1, last_page), pdf_jpg_files
+            )
+        ]
+
+
 class ImageExtractor:
-    def __init__(self, image_data: Union[bytes, Image.Image]):
+    def __init__(
+        self, image_data: Union[bytes, Image.Image, PageRaster, RegionRasterSet]
+    ):
         self.image_data = image_data
 
     def get_image(self) -> Image.Image:
-        """Get PIL Image object from the image data."""
+        """Get PIL Image object from the image data. A grayscale page stays
+        grayscale, so OCR crops are not converted to RGB. A RegionRasterSet has
+        no whole page image, so it raises ValueError."""
+        if isinstance(self.image_data, RegionRasterSet):
+            raise ValueError("A RegionRasterSet can only be cropped")
         if isinstance(self.image_data, Image.Image):
             return self.image_data
-        return Image.open(io.BytesIO(self.image_data)).convert("RGB")
+        if isinstance(self.image_data, PageRaster):
+            return self.image_data.to_image()
+        image = Image.open(io.BytesIO(self.image_data))
+        return image if image.mode == "L" else image.convert("RGB")
+
+    def get_cropped_images(
+        self, coordinates_list: List[Dict[str, Any]]
+    ) -> List[Image.Image]:
+        """Crop the image to each set of decimal coordinates. A PageRaster or
+        RegionRasterSet is cropped as array views, so only the crops are
+        copied."""
+        if isinstance(self.image_data, (PageRaster, RegionRasterSet)):
+            return [
+                self.image_data.crop_image(coordinates)
+                for coordinates in coordinates_list
+            ]
+        image = self.get_image()
+        return [self.crop_image(image, coordinates) for coordinates in coordinates_list]
 
-    def convert_pdf_to_jpg_files(self) -> List[bytes]:
+    def convert_pdf_to_jpg_files(
+        self,
+        first_page: Optional[int] = None,
+        last_page: Optional[int] = None,
+        profile: Optional[RenderProfile] = None,
+    ) -> List[bytes]:
         """Convert the PDF into several JPG files, one for each page.
 
+        Args:
+            first_page: First page to convert, counting from 1. Defaults to the first page.
+            last_page: Last page to convert, inclusive. Defaults to the last page.
+            profile: Resolution, colour and threads to render with. Defaults to
+                200 DPI RGB on one thread.
+
         Returns:
             list: List of JPEG bytes for each page.
         """
         if not isinstance(self.image_data, bytes):
             raise ValueError("PDF conversion requires bytes input")
 
-        images = convert_from_bytes(self.image_data)
+        images = (profile or RenderProfile()).render(
+            self.image_data, first_page=first_page, last_page=last_page
+        )
         jpg_files = []
         for image in images:
             img_byte_arr = io.BytesIO()
@@ -148,15 +404,79 @@ class ImageExtractor:
             jpg_files.append(img_byte_arr.getvalue())
         return jpg_files
 
-    def extract_text_from_coordinates(self, coordinates: Dict[str, Any]) -> str:
-        """Extract text from specific coordinates in an image using OCR."""
-        image = self.get_image()
+    @staticmethod
+    def crop_image(image: Image.Image, coordinates: Dict[str, Any]) -> Image.Image:
+        """Crop an image to decimal coordinates."""
         x_min = int(coordinates["top_left"]["x"] * image.width)
         y_min = int(coordinates["top_left"]["y"] * image.height)
         x_max = int(coordinates["bottom_right"]["x"] * image.width)
         y_max = int(coordinates["bottom_right"]["y"] * image.height)
-        cropped_image = image.crop((x_min, y_min, x_max, y_max))
-        return pytesseract.image_to_string(cropped_image).strip()
+        return image.crop((x_min, y_min, x_max, y_max))
+
+    def extract_text_from_coordinates(
+        self, coordinates: Dict[str, Any], ocr_engine: Optional[OcrEngine] = None
+    ) -> str:
+        """Extract text from specific coordinates in an image using OCR."""
+        ocr_engine = ocr_engine or get_default_ocr_engine()
+        cropped_image = self.get_cropped_images([coordinates])[0]
+        return ocr_engine.image_to_string(cropped_image).strip()
+
+    def extract_texts_from_coordinates(
+        self,
+        coordinates_list: List[Dict[str, Any]],
+        ocr_engine: Optional[OcrEngine] = None,
+    ) -> List[str]:
+        """OCR several regions of the image, letting the engine run them concurrently."""
+        ocr_engine = ocr_engine or get_default_ocr_engine()
+        cropped_images = self.get_cropped_images(coordinates_list)
+        return [text.strip() for text in ocr_engine.images_to_strings(cropped_images)]
+
+    def extract_words(
+        self, ocr_engine: Optional[OcrEngine] = None
+    ) -> List[Dict[str, Any]]:
+        """OCR the whole image once, returning words in the page content format.
+
+        Coordinates are in pixels, and decimal coordinates are relative to the
+        image size, so OCR words can be queried like extracted PDF words.
+        """
+        ocr_engine = ocr_engine or get_default_ocr_engine()
+        image = self.get_image()
+        ocr_data = ocr_engine.image_to_data(image)
+        words: List[Dict[str, Any]] = []
+        for text, confidence, left, top, width, height in zip(
+            ocr_data["text"],
+            ocr_data["conf"],
+            ocr_data["left"],
+            ocr_data["top"],
+            ocr_data["width"],
+            ocr_data["height"],
+        ):
+            text = text.strip()
+            if not text or float(confidence) < 0:
+                continue
+            x0, y0, x1, y1 = left, top, left + width, top + height
+            words.append(
+                {
+                    "text": text,
+                    "bounding_box": {
+                        "coordinates": {
+                            "top_left": {"x": x0, "y": y0},
+                            "bottom_right": {"x": x1, "y": y1},
+                        },
+                        "decimal_coordinates": {
+                            "top_left": {
+                                "x": round((x0 / image.width), 6),
+                                "y": round((y0 / image.height), 6),
+                            },
+                            "bottom_right": {
+                                "x": round((x1 / image.width), 6),
+                                "y": round((y1 / image.height), 6),
+                            },
+                        },
+                    },
+                }
+            )
+        return words
 
     def calculate_average_pixel_value(
         self, jpg_bytes: bytes, coordinates: Dict[str, Dict[str, float]]
@@ -200,17 +520,92 @@ class ImageExtractor:
 
 
 class TextExtractor:
-    def __init__(self, coordinate_utils):
+    def __init__(
+        self,
+        coordinate_utils,
+        ocr_engine: Optional[OcrEngine] = None,
+        instrumentation: Optional[Instrumentation] = None,
+    ):
         self.coordinate_utils = coordinate_utils
+        self.ocr_engine = ocr_engine
+        self.instrumentation = instrumentation or NO_INSTRUMENTATION
+        # Page level OCR results of the page being parsed, keyed by the page
+        # image object. Entries hold the image so its id cannot be reused.
+        self.ocr_words: Dict[
+            int, Tuple[Union[bytes, Image.Image, PageRaster], List[Dict[str, Any]]]
+        ] = {}
 
     def get_text_from_items(self, items: List[Dict[str, Any]]) -> str:
         return " ".join([item["text"] for item in items])
 
+    def get_text_from_indexes(
+        self,
+        page_content: Union[List[Dict[str, Any]], ColumnarWords],
+        indexes: np.ndarray,
+    ) -> str:
+        if isinstance(page_content, ColumnarWords):
+            return page_content.get_text(indexes)
+        return " ".join([page_content[index]["text"] for index in indexes])
+
     def get_text_from_ocr(
-        self, jpg_bytes_page: Union[bytes, Image.Image], coordinates: Dict[str, Any]
+        self,
+        jpg_bytes_page: Union[bytes, Image.Image, PageRaster, RegionRasterSet],
+        coordinates: Dict[str, Any],
     ) -> str:
         image_extractor = ImageExtractor(jpg_bytes_page)
-        return image_extractor.extract_text_from_coordinates(coordinates)
+        return image_extractor.extract_text_from_coordinates(
+            coordinates, self.ocr_engine
+        )
+
+    def get_texts_from_ocr(
+        self,
+        jpg_bytes_page: Union[bytes, Image.Image, PageRaster, RegionRasterSet],
+        coordinates_list: List[Dict[str, Any]],
+        page: Optional[int] = None,
+    ) -> List[str]:
+        """OCR each box of a page image. page is the page number the spans
+        are tagged with."""
+        image_extractor = ImageExtractor(jpg_bytes_page)
+        self.instrumentation.count("ocr_boxes", len(coordinates_list))
+        with self.instrumentation.span("ocr_regions", page=page):
+            return image_extractor.extract_texts_from_coordinates(
+                coordinates_list, self.ocr_engine
+            )
+
+    def get_ocr_words(
+        self,
+        jpg_bytes_page: Union[bytes, Image.Image, PageRaster],
+        page: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """OCR a page once and cache its words for later box queries, until
+        clear_ocr_words is called. page is the page number the span is tagged
+        with."""
+        cached = self.ocr_words.get(id(jpg_bytes_page))
+        if cached is not None and cached[0] is jpg_bytes_page:
+            return cached[1]
+
+        with self.instrumentation.span("ocr_page", page=page):
+            words = ImageExtractor(jpg_bytes_page).extract_words(self.ocr_engine)
+        self.ocr_words[id(jpg_bytes_page)] = (jpg_bytes_page, words)
+        return words
+
+    def clear_ocr_words(self) -> None:
+        """Forget the cached OCR words, and the page images they hold, once
+        the pages are done."""
+        self.ocr_words.clear()
+
+    def get_text_in_bounding_box(
+        self,
+        page_content: Union[List[Dict[str, Any]], ColumnarWords],
+        box_coordinates: Dict[str, Dict[str, float]],
+    ) -> str:
+        if isinstance(page_content, ColumnarWords):
+            indexes = page_content.spatial_index.query(box_coordinates)
+            return page_content.get_text(indexes)
+        items_within_coordinates = self.get_items_in_bounding_box(
+            page_content, box_coordinates
+        )
+        return self.get_text_from_items(items_within_coordinates)
 
     def get_items_in_bounding_box(
         self,
@@ -218,24 +613,32 @@ class TextExtractor:
         box_coordinates: Dict[str, Dict[str, float]],
         threshold: float = 0.005,
     ) -> List[Dict[str, Any]]:
-        return self.coordinate_utils.get_items_in_bounding_box(
+        return self.coordinate_utils.get_indexed_items_in_bounding_box(
             text_coordinates, box_coordinates, threshold
         )
 
     def get_text_from_page(
         self,
-        page_content: List[Dict[str, Any]],
+        page_content: Union[List[Dict[str, Any]], ColumnarWords],
         coordinates: Optional[Dict[str, Dict[str, float]]],
         extraction_method: str,
-        jpg_bytes_page: Union[bytes, Image.Image],
+        jpg_bytes_page: Optional[Union[bytes, Image.Image, PageRaster]],
         search_type: Optional[str] = None,
         regex: Optional[str] = None,
+        ocr_mode: str = "region",
     ) -> str:
-        """Extract text using either coordinates, OCR, or regex"""
+        """Extract text using either coordinates, OCR, or regex
+
+        With ocr_mode "page" the page is OCRed once and the words inside the
+        coordinates are looked up, instead of OCRing a crop for every box.
+        """
         if search_type == "regex" and regex:
             try:
                 # Join all text from the page with spaces
-                full_page_text = " ".join([item["text"] for item in page_content])
+                if isinstance(page_content, ColumnarWords):
+                    full_page_text = page_content.get_text()
+                else:
+                    full_page_text = " ".join([item["text"] for item in page_content])
 
                 # Use regex to find matches
                 matches = re.findall(regex, full_page_text)
@@ -262,10 +665,13 @@ class TextExtractor:
             return ""
 
         if extraction_method == "extraction":
-            items_within_coordinates = self.get_items_in_bounding_box(
-                page_content, coordinates
-            )
-            return self.get_text_from_items(items_within_coordinates)
+            return self.get_text_in_bounding_box(page_content, coordinates)
         elif extraction_method == "ocr":
+            if jpg_bytes_page is None:
+                raise ValueError("OCR extraction requires the page image")
+            if ocr_mode == "page":
+                return self.get_text_in_bounding_box(
+                    self.get_ocr_words(jpg_bytes_page), coordinates
+                )
             return self.get_text_from_ocr(jpg_bytes_page, coordinates)
         return ""
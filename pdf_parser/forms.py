@@ -1,4 +1,5 @@
-from typing import Dict, List, Any
+from typing import Any, Dict, Sequence
+
 from pdf_parser.coordinate_utils import CoordinateUtils
 from pdf_parser.extractors import TextExtractor
 
@@ -14,16 +15,18 @@ class FormProcessor:
         page_index: int,
         pdf_data: Dict[str, Any],
         template: Dict[str, Any],
-        jpg_bytes: List[bytes],
+        jpg_bytes: Sequence[bytes],
     ) -> Dict[str, str]:
         form_rule = self.coordinate_utils.get_rule_from_id(form_rule_id, template)
         config = form_rule["config"]
         coordinates = config.get("coordinates")
         page_content = pdf_data["pages"][page_index]["content"]
         extraction_method = template["extraction_method"]
-        jpg_bytes_page = jpg_bytes[page_index]
+        # Only touch the page image when it is needed, so lazy documents skip rendering
+        jpg_bytes_page = jpg_bytes[page_index] if extraction_method == "ocr" else None
         search_type = config.get("search_type")
         regex = config.get("regex")
+        ocr_mode = template.get("ocr_mode", "region")
 
         return {
             config["field_name"]: self.text_extractor.get_text_from_page(
@@ -33,5 +36,6 @@ class FormProcessor:
                 jpg_bytes_page,
                 search_type=search_type,
                 regex=regex,
+                ocr_mode=ocr_mode,
             )
         }
@@ -0,0 +1,181 @@
+import io
+import json
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import pdfplumber
+
+from pdf_parser.extractors import DataExtractor
+
+# Positions are compared on a grid of this size, in decimal coordinates
+GRID_SIZE = 0.02
+# Only words above this decimal height are anchors. Lower down are the
+# transactions and other text that changes between documents of one layout.
+HEADER_HEIGHT = 0.2
+
+
+class Fingerprint:
+    """The layout of a document's first page, as a set of tokens.
+
+    Anchor words are the words without digits that appear once in the page
+    header, so account numbers, dates, amounts and repeated or transaction
+    text are ignored. Each gives a token for the word and one for the word at
+    its grid cell. Horizontal and vertical lines anywhere on the page give a
+    token for their grid row or column.
+    """
+
+    def __init__(self, tokens: Set[str]) -> None:
+        self.tokens = tokens
+
+    @staticmethod
+    def quantize(value: float) -> int:
+        return int(round(value / GRID_SIZE))
+
+    @classmethod
+    def from_page_data(
+        cls, words: List[Dict[str, Any]], lines: List[Dict[str, Any]]
+    ) -> "Fingerprint":
+        tokens = set()
+        anchors = []
+        for word in words:
+            text = re.sub(r"[^a-z]", "", word["text"].lower())
+            if len(text) < 3 or any(character.isdigit() for character in word["text"]):
+                continue
+            top_left = word["bounding_box"]["decimal_coordinates"]["top_left"]
+            if top_left["y"] <= HEADER_HEIGHT:
+                anchors.append((text, top_left))
+        counts = Counter(text for text, _ in anchors)
+        for text, top_left in anchors:
+            if counts[text] > 1:
+                continue
+            tokens.add(f"word:{text}")
+            tokens.add(
+                f"anchor:{text}@{cls.quantize(top_left['x'])},"
+                f"{cls.quantize(top_left['y'])}"
+            )
+        for line in lines:
+            top_left = line["decimal_coordinates"]["top_left"]
+            bottom_right = line["decimal_coordinates"]["bottom_right"]
+            if cls.quantize(top_left["y"]) == cls.quantize(bottom_right["y"]):
+                tokens.add(f"hline:{cls.quantize(top_left['y'])}")
+            elif cls.quantize(top_left["x"]) == cls.quantize(bottom_right["x"]):
+                tokens.add(f"vline:{cls.quantize(top_left['x'])}")
+        return cls(tokens)
+
+    @classmethod
+    def from_pdf_bytes(cls, pdf_bytes: bytes) -> "Fingerprint":
+        """Fingerprint a PDF, extracting its first page only and without
+        rendering it."""
+        data_extractor = DataExtractor(pdf_bytes)
+        # Only the first page is built into a pdfplumber Page
+        with pdfplumber.open(io.BytesIO(pdf_bytes), pages=[1]) as pdf:
+            if not pdf.pages:
+                return cls(set())
+            page = pdf.pages[0]
+            return cls.from_page_data(
+                data_extractor.extract_page_text_data(page),
+                data_extractor.extract_page_line_data(page, None),
+            )
+
+
+class TemplateIdentifier:
+    """Chooses the template for a PDF by matching first page fingerprints.
+
+    Register each template with one or more sample documents. Tokens are kept in an
+    inverted index and weighted by how few templates share them, and a
+    document scores, for each template, the weighted share of that template's
+    tokens it contains. Only templates that share a token with the document
+    are scored.
+    """
+
+    def __init__(self, min_score: float = 0.5) -> None:
+        self.min_score = min_score
+        self.fingerprints: Dict[str, Fingerprint] = {}
+        self.index: Dict[str, Set[str]] = defaultdict(set)
+        self._total_weights: Dict[str, float] = {}
+
+    def register(self, template_id: str, *samples: Any) -> None:
+        """Register a template from one or more samples, as PDF bytes or
+        Fingerprints. With several samples only the tokens they all share are
+        kept, which drops anything that varies between documents."""
+        if not samples:
+            raise ValueError("At least one sample is required")
+        fingerprints = [
+            (
+                sample
+                if isinstance(sample, Fingerprint)
+                else Fingerprint.from_pdf_bytes(sample)
+            )
+            for sample in samples
+        ]
+        fingerprint = Fingerprint(
+            set.intersection(*(sample.tokens for sample in fingerprints))
+        )
+        if template_id in self.fingerprints:
+            for token in self.fingerprints[template_id].tokens:
+                self.index[token].discard(template_id)
+        self.fingerprints[template_id] = fingerprint
+        for token in fingerprint.tokens:
+            self.index[token].add(template_id)
+        self._total_weights = {}
+
+    def weight(self, token: str) -> float:
+        return math.log(1 + len(self.fingerprints) / len(self.index[token]))
+
+    def get_total_weight(self, template_id: str) -> float:
+        if not self._total_weights:
+            self._total_weights = {
+                registered_id: sum(self.weight(token) for token in fingerprint.tokens)
+                for registered_id, fingerprint in self.fingerprints.items()
+            }
+        return self._total_weights[template_id]
+
+    def rank(self, fingerprint: Fingerprint) -> List[Tuple[str, float]]:
+        """Score every template that shares a token with the fingerprint, best
+        first."""
+        matched_weights: Dict[str, float] = defaultdict(float)
+        for token in fingerprint.tokens:
+            template_ids = self.index.get(token)
+            if not template_ids:
+                continue
+            weight = self.weight(token)
+            for template_id in template_ids:
+                matched_weights[template_id] += weight
+        scores = [
+            (template_id, matched_weight / self.get_total_weight(template_id))
+            for template_id, matched_weight in matched_weights.items()
+        ]
+        return sorted(scores, key=lambda score: (-score[1], score[0]))
+
+    def identify(self, document: Any) -> Optional[str]:
+        """Get the best matching template id for PDF bytes or a Fingerprint, or
+        None when no template scores at least min_score."""
+        fingerprint = (
+            document
+            if isinstance(document, Fingerprint)
+            else Fingerprint.from_pdf_bytes(document)
+        )
+        ranking = self.rank(fingerprint)
+        if ranking and ranking[0][1] >= self.min_score:
+            return ranking[0][0]
+        return None
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as index_file:
+            json.dump(
+                {
+                    template_id: sorted(fingerprint.tokens)
+                    for template_id, fingerprint in self.fingerprints.items()
+                },
+                index_file,
+            )
+
+    @classmethod
+    def load(cls, path: str, min_score: float = 0.5) -> "TemplateIdentifier":
+        identifier = cls(min_score)
+        with open(path) as index_file:
+            for template_id, tokens in json.load(index_file).items():
+                identifier.register(template_id, Fingerprint(set(tokens)))
+        return identifier
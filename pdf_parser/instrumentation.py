@@ -0,0 +1,210 @@
+import cProfile
+import logging
+import pstats
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import Any, ContextManager, Dict, Iterator, List, Optional
+
+# Returned by the no-op instrumentation for every span. nullcontext can be
+# entered any number of times.
+_NO_SPAN = nullcontext()
+
+
+class Instrumentation:
+    """Receives timing spans and counters from each parsing stage.
+
+    Spans are opened around rendering, word and line extraction, template and
+    output validation, OCR, each page's evaluation and each table's assembly,
+    with the page number and rule id as attributes where they apply. This base
+    class ignores them, so parsing pays almost nothing unless a recording
+    instrumentation is passed in.
+    """
+
+    def span(self, name: str, **attributes: Any) -> ContextManager[None]:
+        return _NO_SPAN
+
+    def count(self, name: str, value: float = 1, **attributes: Any) -> None:
+        pass
+
+    def document(self) -> ContextManager[None]:
+        """Wraps the parsing of one document."""
+        return _NO_SPAN
+
+    def report(self) -> Optional[Dict[str, Any]]:
+        """The timings of the current document, to add to its output metadata."""
+        return None
+
+
+NO_INSTRUMENTATION = Instrumentation()
+
+
+class TimingRecorder(Instrumentation):
+    """Records every span and counter of the current document.
+
+    A document's spans start with the first one recorded after the previous
+    document ended, so rendering and extraction done before parsing count
+    towards it. report() sums the seconds spent in each stage over the whole
+    document, on each page and in each rule. Spans nest, so a page's
+    evaluation includes the OCR and table assembly done on it.
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the spans and counters recorded so far."""
+        self.spans: List[Dict[str, Any]] = []
+        self.counters: Dict[str, float] = defaultdict(float)
+        self._started_at: Optional[float] = None
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[None]:
+        started_at = time.perf_counter()
+        if self._started_at is None:
+            self._started_at = started_at
+        try:
+            yield
+        finally:
+            record = {
+                "name": name,
+                "seconds": time.perf_counter() - started_at,
+                **attributes,
+            }
+            self.spans.append(record)
+            self.on_span(record)
+
+    def on_span(self, record: Dict[str, Any]) -> None:
+        """Called as each span ends. Override to export spans."""
+        pass
+
+    def count(self, name: str, value: float = 1, **attributes: Any) -> None:
+        self.counters[name] += value
+
+    @contextmanager
+    def document(self) -> Iterator[None]:
+        if self._started_at is None:
+            self._started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.on_document(self.report())
+            self.reset()
+
+    def on_document(self, report: Dict[str, Any]) -> None:
+        """Called with the report once a document is done. Override to export
+        reports."""
+        pass
+
+    def report(self) -> Dict[str, Any]:
+        stages: Dict[str, Dict[str, float]] = {}
+        pages: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        rules: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        for record in self.spans:
+            stage = stages.setdefault(record["name"], {"calls": 0, "seconds": 0.0})
+            stage["calls"] += 1
+            stage["seconds"] += record["seconds"]
+            if record.get("page") is not None:
+                pages[str(record["page"])][record["name"]] += record["seconds"]
+            if "rule_id" in record:
+                rules[record["rule_id"]][record["name"]] += record["seconds"]
+        ended_at = time.perf_counter()
+        started_at = ended_at if self._started_at is None else self._started_at
+        return {
+            "total_seconds": round(ended_at - started_at, 6),
+            "stages": {
+                name: {"calls": stage["calls"], "seconds": round(stage["seconds"], 6)}
+                for name, stage in stages.items()
+            },
+            "pages": self._round_seconds(pages),
+            "rules": self._round_seconds(rules),
+            "counters": dict(self.counters),
+        }
+
+    @staticmethod
+    def _round_seconds(
+        groups: Dict[str, Dict[str, float]]
+    ) -> Dict[str, Dict[str, float]]:
+        return {
+            key: {name: round(seconds, 6) for name, seconds in group.items()}
+            for key, group in groups.items()
+        }
+
+
+class LoggingInstrumentation(TimingRecorder):
+    """Logs each span as it ends and a summary of each document."""
+
+    def __init__(
+        self, logger: Optional[logging.Logger] = None, level: int = logging.DEBUG
+    ) -> None:
+        super().__init__()
+        self.logger = logger or logging.getLogger("pdf_parser")
+        self.level = level
+
+    def on_span(self, record: Dict[str, Any]) -> None:
+        attributes = "".join(
+            f" {key}={value}"
+            for key, value in record.items()
+            if key not in ("name", "seconds") and value is not None
+        )
+        self.logger.log(
+            self.level,
+            "%s took %.4fs%s",
+            record["name"],
+            record["seconds"],
+            attributes,
+        )
+
+    def on_document(self, report: Dict[str, Any]) -> None:
+        self.logger.log(
+            self.level,
+            "document took %.4fs: %s",
+            report["total_seconds"],
+            ", ".join(
+                f"{name} {stage['seconds']:.4f}s"
+                for name, stage in report["stages"].items()
+            ),
+        )
+
+
+class DocumentProfiler:
+    """Profiles the parsing of the documents it is passed with.
+
+    Pass one to ParserSession.parse or Parser.parse_data to profile that
+    document only. kind is "cprofile", or "pyinstrument" if it is installed.
+    The last profile is kept in stats (a pstats.Stats) or session (a
+    pyinstrument Session), and written to output_path when one is given.
+    """
+
+    def __init__(self, kind: str = "cprofile", output_path: Optional[str] = None):
+        if kind not in ("cprofile", "pyinstrument"):
+            raise ValueError(f"Unknown profiler '{kind}'")
+        self.kind = kind
+        self.output_path = output_path
+        self.stats: Optional[pstats.Stats] = None
+        self.session: Any = None
+        self._profiler: Any = None
+
+    def __enter__(self) -> "DocumentProfiler":
+        if self.kind == "pyinstrument":
+            from pyinstrument import Profiler
+
+            self._profiler = Profiler()
+            self._profiler.start()
+        else:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        if self.kind == "pyinstrument":
+            self.session = self._profiler.stop()
+            if self.output_path:
+                with open(self.output_path, "w") as output_file:
+                    output_file.write(self._profiler.output_html())
+        else:
+            self._profiler.disable()
+            self.stats = pstats.Stats(self._profiler)
+            if self.output_path:
+                self.stats.dump_stats(self.output_path)
+        self._profiler = None
@@ -1,8 +1,24 @@
+import atexit
 import io
-from typing import Dict, Any
+import logging
+import os
+import shlex
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
 import pytesseract  # type: ignore
 from PIL import Image
 
+from pdf_parser.ocr_cache import OcrCache
+
+try:
+    import tesserocr  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    tesserocr = None
+
+logger = logging.getLogger(__name__)
+
 
 class ImageExtractor:
     def __init__(self, jpg_bytes: bytes, coordinates: Dict[str, Any]) -> None:
@@ -28,3 +44,269 @@ class ImageExtractor:
         y_max = int(coordinates["bottom_right"]["y"] * image.height)
         cropped_image = image.crop((x_min, y_min, x_max, y_max))
         return pytesseract.image_to_string(cropped_image).strip()
+
+
+class OcrEngine(ABC):
+    """Interface for the OCR backends used by TextExtractor."""
+
+    def __init__(self, language: str = "eng", config: str = "") -> None:
+        self.language = language
+        self.config = config
+
+    @property
+    def cache_key(self) -> str:
+        """Identifies the settings that affect this engine's output."""
+        return f"{self.language}|{self.config}"
+
+    @abstractmethod
+    def image_to_string(self, image: Image.Image) -> str:
+        pass
+
+    @abstractmethod
+    def image_to_data(self, image: Image.Image) -> Dict[str, List[Any]]:
+        """OCR words with boxes, in pytesseract's Output.DICT layout."""
+
+    def images_to_strings(self, images: List[Image.Image]) -> List[str]:
+        return [self.image_to_string(image) for image in images]
+
+    def close(self) -> None:
+        pass
+
+
+class PytesseractEngine(OcrEngine):
+    """Runs a fresh tesseract process for every image."""
+
+    def image_to_string(self, image: Image.Image) -> str:
+        return pytesseract.image_to_string(
+            image, lang=self.language, config=self.config
+        )
+
+    def image_to_data(self, image: Image.Image) -> Dict[str, List[Any]]:
+        return pytesseract.image_to_data(
+            image,
+            lang=self.language,
+            config=self.config,
+            output_type=pytesseract.Output.DICT,
+        )
+
+
+class TesserocrEngine(OcrEngine):
+    """Keeps one initialised tesseract API in process, so the language model is
+    only loaded once. Requires the optional tesserocr package.
+
+    config takes the tesseract command line options --psm, --oem,
+    --tessdata-dir and -c name=value. Any other option raises ValueError.
+    """
+
+    def __init__(self, language: str = "eng", config: str = "") -> None:
+        if tesserocr is None:
+            raise ImportError("TesserocrEngine requires the tesserocr package")
+        super().__init__(language, config)
+        api_options, variables = self.parse_config(config)
+        self.api = tesserocr.PyTessBaseAPI(lang=language, **api_options)
+        for name, value in variables.items():
+            if not self.api.SetVariable(name, value):
+                self.api.End()
+                raise ValueError(f"Unknown tesseract variable '{name}'")
+
+    @staticmethod
+    def parse_config(config: str) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Split a tesseract config string into PyTessBaseAPI arguments and
+        variables to set."""
+        api_options: Dict[str, Any] = {}
+        variables: Dict[str, str] = {}
+        arguments = shlex.split(config)
+        while arguments:
+            argument = arguments.pop(0)
+            if argument in ("--psm", "--oem", "--tessdata-dir", "-c"):
+                if not arguments:
+                    raise ValueError(f"Tesseract option {argument} needs a value")
+                value = arguments.pop(0)
+            elif argument.startswith("-c") and "=" in argument:
+                argument, value = "-c", argument[2:]
+            else:
+                raise ValueError(f"Unsupported tesseract option '{argument}'")
+
+            if argument == "--psm":
+                api_options["psm"] = int(value)
+            elif argument == "--oem":
+                api_options["oem"] = int(value)
+            elif argument == "--tessdata-dir":
+                api_options["path"] = value
+            else:
+                name, separator, variable_value = value.partition("=")
+                if not separator:
+                    raise ValueError(f"Tesseract variable '{value}' needs a value")
+                variables[name] = variable_value
+        return api_options, variables
+
+    def image_to_string(self, image: Image.Image) -> str:
+        self.api.SetImage(image)
+        return self.api.GetUTF8Text()
+
+    def image_to_data(self, image: Image.Image) -> Dict[str, List[Any]]:
+        self.api.SetImage(image)
+        self.api.Recognize()
+        data: Dict[str, List[Any]] = {
+            "text": [],
+            "conf": [],
+            "left": [],
+            "top": [],
+            "width": [],
+            "height": [],
+        }
+        iterator = self.api.GetIterator()
+        level = tesserocr.RIL.WORD
+        for word in tesserocr.iterate_level(iterator, level):
+            box = word.BoundingBox(level)
+            if box is None:
+                continue
+            left, top, right, bottom = box
+            data["text"].append(word.GetUTF8Text(level))
+            data["conf"].append(word.Confidence(level))
+            data["left"].append(left)
+            data["top"].append(top)
+            data["width"].append(right - left)
+            data["height"].append(bottom - top)
+        return data
+
+    def close(self) -> None:
+        self.api.End()
+
+
+_worker_engine: Optional[OcrEngine] = None
+
+
+def get_local_ocr_engine(language: str = "eng", config: str = "") -> OcrEngine:
+    """Get an engine that runs in the calling process, using tesserocr when it is
+    installed and can apply the config, and pytesseract otherwise."""
+    if tesserocr is not None:
+        try:
+            TesserocrEngine.parse_config(config)
+        except ValueError:
+            return PytesseractEngine(language, config)
+        return TesserocrEngine(language, config)
+    return PytesseractEngine(language, config)
+
+
+def _initialise_worker(language: str, config: str) -> None:
+    global _worker_engine
+    _worker_engine = get_local_ocr_engine(language, config)
+
+
+def _worker_image_to_string(image: Image.Image) -> str:
+    assert _worker_engine is not None
+    return _worker_engine.image_to_string(image)
+
+
+def _worker_image_to_data(image: Image.Image) -> Dict[str, List[Any]]:
+    assert _worker_engine is not None
+    return _worker_engine.image_to_data(image)
+
+
+class OcrWorkerPool(OcrEngine):
+    """Pool of long-lived OCR worker processes.
+
+    Each worker initialises its engine once, using tesserocr when it is
+    installed and pytesseract otherwise, and batches of crops are spread
+    across the workers. Without tesserocr, each worker still starts a
+    tesseract process for every crop, so a warning is logged.
+    """
+
+    def __init__(
+        self, workers: Optional[int] = None, language: str = "eng", config: str = ""
+    ) -> None:
+        super().__init__(language, config)
+        if tesserocr is None:
+            logger.warning(
+                "tesserocr is not installed, so OCR workers start a tesseract "
+                "process for every image. Install tesserocr to keep one "
+                "tesseract instance per worker."
+            )
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_initialise_worker,
+            initargs=(language, config),
+        )
+
+    def image_to_string(self, image: Image.Image) -> str:
+        return self.executor.submit(_worker_image_to_string, image).result()
+
+    def image_to_data(self, image: Image.Image) -> Dict[str, List[Any]]:
+        return self.executor.submit(_worker_image_to_data, image).result()
+
+    def images_to_strings(self, images: List[Image.Image]) -> List[str]:
+        return list(self.executor.map(_worker_image_to_string, images))
+
+    def close(self) -> None:
+        self.executor.shutdown()
+
+
+class CachedOcrEngine(OcrEngine):
+    """Wraps another engine, reusing results for images it has already seen."""
+
+    def __init__(self, engine: OcrEngine, cache: Optional[OcrCache] = None) -> None:
+        super().__init__(engine.language, engine.config)
+        self.engine = engine
+        self.cache = cache or OcrCache()
+
+    @property
+    def cache_key(self) -> str:
+        return self.engine.cache_key
+
+    def image_to_string(self, image: Image.Image) -> str:
+        return self.images_to_strings([image])[0]
+
+    def image_to_data(self, image: Image.Image) -> Dict[str, List[Any]]:
+        key = self.cache.make_key(image, "data", self.cache_key)
+        data = self.cache.get(key)
+        if data is None:
+            data = self.engine.image_to_data(image)
+            self.cache.put(key, data)
+        return data
+
+    def images_to_strings(self, images: List[Image.Image]) -> List[str]:
+        keys = [
+            self.cache.make_key(image, "string", self.cache_key) for image in images
+        ]
+        texts: Dict[str, str] = {}
+        missing: Dict[str, Image.Image] = {}
+        for key, image in zip(keys, images):
+            if key in texts or key in missing:
+                continue
+            text = self.cache.get(key)
+            if text is None:
+                missing[key] = image
+            else:
+                texts[key] = text
+        if missing:
+            recognised = self.engine.images_to_strings(list(missing.values()))
+            for key, text in zip(missing, recognised):
+                texts[key] = text
+                self.cache.put(key, text)
+        return [texts[key] for key in keys]
+
+    def close(self) -> None:
+        self.engine.close()
+        self.cache.close()
+
+
+_default_engine: Optional[OcrEngine] = None
+
+
+def get_default_ocr_engine() -> OcrEngine:
+    """Get the shared OCR engine, starting a cached worker pool on first use."""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = CachedOcrEngine(OcrWorkerPool())
+        atexit.register(_default_engine.close)
+    return _default_engine
+
+
+def set_default_ocr_engine(engine: OcrEngine) -> None:
+    """Replace the shared OCR engine, for example with a differently sized pool."""
+    global _default_engine
+    if _default_engine is not None:
+        _default_engine.close()
+    _default_engine = engine
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from PIL import Image
+
+
+class OcrCache:
+    """Content addressed store for OCR results.
+
+    Results are keyed by a hash of the image pixels and the OCR settings, so
+    the same region of the same layout is only recognised once. Entries live
+    in an in-memory LRU and, when a path is given, in a sqlite file that is
+    trimmed to max_disk_bytes by evicting the least recently used entries.
+
+    The access times of disk hits are written in batches of
+    access_batch_size, or with the next put, rather than committed on every
+    hit.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        path: Optional[str] = None,
+        max_disk_bytes: int = 256 * 1024 * 1024,
+        access_batch_size: int = 256,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.access_batch_size = access_batch_size
+        self.memory: "OrderedDict[str, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        # Access times of disk hits not written yet
+        self._accessed: Dict[str, float] = {}
+        # Bytes of results on disk, counted on open and kept up to date by put
+        self._disk_size = 0
+        if path is not None:
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "size INTEGER NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS ocr_results_accessed "
+                "ON ocr_results (accessed)"
+            )
+            self._connection.commit()
+            self._disk_size = self._get_disk_size()
+
+    @staticmethod
+    def make_key(image: Image.Image, *settings: str) -> str:
+        """Hash an image's pixels together with the settings used to OCR it."""
+        digest = hashlib.sha256()
+        digest.update(f"{image.mode}|{image.width}x{image.height}".encode())
+        for setting in settings:
+            digest.update(b"|" + setting.encode())
+        digest.update(b"|" + image.tobytes())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return self.memory[key]
+
+            if self._connection is not None:
+                row = self._connection.execute(
+                    "SELECT value FROM ocr_results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    self._accessed[key] = time.time()
+                    if len(self._accessed) >= self.access_batch_size:
+                        self._write_access_times()
+                        self._connection.commit()
+                    value = json.loads(row[0])
+                    self._remember(key, value)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._remember(key, value)
+            if self._connection is not None:
+                serialised = json.dumps(value)
+                replaced = self._connection.execute(
+                    "SELECT size FROM ocr_results WHERE key = ?", (key,)
+                ).fetchone()
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO ocr_results VALUES (?, ?, ?, ?)",
+                    (key, serialised, len(serialised), time.time()),
+                )
+                self._accessed.pop(key, None)
+                self._disk_size += len(serialised) - (replaced[0] if replaced else 0)
+                self._write_access_times()
+                self._evict_from_disk()
+                self._connection.commit()
+
+    def _remember(self, key: str, value: Any) -> None:
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def _get_disk_size(self) -> int:
+        assert self._connection is not None
+        return self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM ocr_results"
+        ).fetchone()[0]
+
+    def _write_access_times(self) -> None:
+        assert self._connection is not None
+        if not self._accessed:
+            return
+        self._connection.executemany(
+            "UPDATE ocr_results SET accessed = ? WHERE key = ?",
+            [(accessed, key) for key, accessed in self._accessed.items()],
+        )
+        self._accessed.clear()
+
+    def _evict_from_disk(self) -> None:
+        assert self._connection is not None
+        if self._disk_size <= self.max_disk_bytes:
+            return
+        # Recount before evicting, in case other processes share the file
+        self._disk_size = self._get_disk_size()
+        if self._disk_size <= self.max_disk_bytes:
+            return
+        rows = self._connection.execute(
+            "SELECT key, size FROM ocr_results ORDER BY accessed"
+        )
+        evicted = []
+        for key, size in rows:
+            if self._disk_size <= self.max_disk_bytes:
+                break
+            evicted.append((key,))
+            self._disk_size -= size
+        self._connection.executemany("DELETE FROM ocr_results WHERE key = ?", evicted)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "memory_entries": len(self.memory),
+        }
+
+    def close(self) -> None:
+        if self._connection is not None:
+            with self._lock:
+                self._write_access_times()
+                self._connection.commit()
+            self._connection.close()
+            self._connection = None
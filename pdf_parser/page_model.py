@@ -0,0 +1,276 @@
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from pdf_parser.coordinate_utils import SpatialIndex
+
+
+def _restore(values: np.ndarray, digits: int) -> List[float]:
+    """Convert float32 values back to the rounded floats of the dict format."""
+    return [round(value, digits) for value in values.tolist()]
+
+
+class ColumnarWords:
+    """Compact, array backed equivalent of a page's "content" word list.
+
+    Decimal coordinates are held in float32 x0/y0/x1/y1 arrays and absolute
+    coordinates in a float32 (n, 4) array. Iterating yields items in the usual
+    nested dict format, so code written against word lists keeps working.
+    """
+
+    def __init__(
+        self,
+        text: np.ndarray,
+        x0: np.ndarray,
+        y0: np.ndarray,
+        x1: np.ndarray,
+        y1: np.ndarray,
+        absolute: np.ndarray,
+    ) -> None:
+        self.text = text
+        self.x0 = x0
+        self.y0 = y0
+        self.x1 = x1
+        self.y1 = y1
+        self.absolute = absolute
+        self._spatial_index: Optional[SpatialIndex] = None
+
+    @classmethod
+    def empty(cls, size: int) -> "ColumnarWords":
+        return cls(
+            np.empty(size, dtype=object),
+            np.empty(size, dtype=np.float32),
+            np.empty(size, dtype=np.float32),
+            np.empty(size, dtype=np.float32),
+            np.empty(size, dtype=np.float32),
+            np.empty((size, 4), dtype=np.float32),
+        )
+
+    @classmethod
+    def from_page(cls, page: Any) -> "ColumnarWords":
+        """Build the columns straight from a pdfplumber page."""
+        elements = page.extract_words()
+        words = cls.empty(len(elements))
+        for index, element in enumerate(elements):
+            x0, y0, x1, y1 = (
+                round(element["x0"], 2),
+                round(element["top"], 2),
+                round(element["x1"], 2),
+                round(element["bottom"], 2),
+            )
+            words.text[index] = element["text"]
+            words.absolute[index] = (x0, y0, x1, y1)
+            words.x0[index] = round((x0 / page.width), 6)
+            words.y0[index] = round((y0 / page.height), 6)
+            words.x1[index] = round((x1 / page.width), 6)
+            words.y1[index] = round((y1 / page.height), 6)
+        return words
+
+    @classmethod
+    def from_items(cls, items: List[Dict[str, Any]]) -> "ColumnarWords":
+        words = cls.empty(len(items))
+        for index, item in enumerate(items):
+            bounding_box = item["bounding_box"]
+            coordinates = bounding_box["coordinates"]
+            decimal_coordinates = bounding_box["decimal_coordinates"]
+            words.text[index] = item["text"]
+            words.absolute[index] = (
+                coordinates["top_left"]["x"],
+                coordinates["top_left"]["y"],
+                coordinates["bottom_right"]["x"],
+                coordinates["bottom_right"]["y"],
+            )
+            words.x0[index] = decimal_coordinates["top_left"]["x"]
+            words.y0[index] = decimal_coordinates["top_left"]["y"]
+            words.x1[index] = decimal_coordinates["bottom_right"]["x"]
+            words.y1[index] = decimal_coordinates["bottom_right"]["y"]
+        return words
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.to_items())
+
+    @property
+    def spatial_index(self) -> SpatialIndex:
+        """Spatial index over the decimal coordinates, built on first use."""
+        if self._spatial_index is None:
+            self._spatial_index = SpatialIndex(
+                np.array(_restore(self.x0, 6), dtype=np.float64),
+                np.array(_restore(self.y0, 6), dtype=np.float64),
+                np.array(_restore(self.x1, 6), dtype=np.float64),
+                np.array(_restore(self.y1, 6), dtype=np.float64),
+            )
+        return self._spatial_index
+
+    def get_text(self, indexes: Optional[np.ndarray] = None) -> str:
+        """Join the text of the given words, or of every word on the page."""
+        texts = self.text if indexes is None else self.text[indexes]
+        return " ".join(texts.tolist())
+
+    def to_items(self, indexes: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """Convert the given words, or every word, back to the nested dict format."""
+        if indexes is None:
+            indexes = np.arange(len(self))
+        texts = self.text[indexes].tolist()
+        absolute = [_restore(column, 2) for column in self.absolute[indexes].T]
+        decimal = [
+            _restore(column[indexes], 6)
+            for column in (self.x0, self.y0, self.x1, self.y1)
+        ]
+        return [
+            {
+                "text": text,
+                "bounding_box": {
+                    "coordinates": {
+                        "top_left": {"x": x0, "y": y0},
+                        "bottom_right": {"x": x1, "y": y1},
+                    },
+                    "decimal_coordinates": {
+                        "top_left": {"x": decimal_x0, "y": decimal_y0},
+                        "bottom_right": {"x": decimal_x1, "y": decimal_y1},
+                    },
+                },
+            }
+            for (
+                text,
+                x0,
+                y0,
+                x1,
+                y1,
+                decimal_x0,
+                decimal_y0,
+                decimal_x1,
+                decimal_y1,
+            ) in zip(texts, *absolute, *decimal)
+        ]
+
+
+class ColumnarLines:
+    """Compact, array backed equivalent of a page's "lines" list.
+
+    Holds float32 decimal x0/y0/x1/y1 arrays, where y0 is the "top_left" y, and
+    a uint8 (n, 3) array of average RGB values when the lines were sampled.
+    When only some lines have a colour, the sampled mask marks which.
+    """
+
+    def __init__(
+        self,
+        x0: np.ndarray,
+        y0: np.ndarray,
+        x1: np.ndarray,
+        y1: np.ndarray,
+        average_pixel_values: Optional[np.ndarray] = None,
+        sampled: Optional[np.ndarray] = None,
+    ) -> None:
+        self.x0 = x0
+        self.y0 = y0
+        self.x1 = x1
+        self.y1 = y1
+        self.average_pixel_values = average_pixel_values
+        self.sampled = sampled
+
+    @classmethod
+    def from_items(cls, lines: List[Dict[str, Any]]) -> "ColumnarLines":
+        coordinates = np.array(
+            [
+                [
+                    line["decimal_coordinates"]["top_left"]["x"],
+                    line["decimal_coordinates"]["top_left"]["y"],
+                    line["decimal_coordinates"]["bottom_right"]["x"],
+                    line["decimal_coordinates"]["bottom_right"]["y"],
+                ]
+                for line in lines
+            ],
+            dtype=np.float32,
+        ).reshape(-1, 4)
+        average_pixel_values = None
+        sampled = np.array(
+            ["average_pixel_value" in line for line in lines], dtype=bool
+        )
+        if sampled.any():
+            average_pixel_values = np.array(
+                [line.get("average_pixel_value", (0, 0, 0)) for line in lines],
+                dtype=np.uint8,
+            ).reshape(-1, 3)
+        return cls(
+            *coordinates.T,
+            average_pixel_values=average_pixel_values,
+            sampled=None if sampled.all() else sampled,
+        )
+
+    def __len__(self) -> int:
+        return len(self.x0)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.to_items())
+
+    def get_top_y_coordinates(
+        self, max_pixel_value: Optional[int] = None
+    ) -> List[float]:
+        """Get the top y of lines no brighter than max_pixel_value in any channel."""
+        if self.average_pixel_values is None:
+            return []
+        mask = np.all(self.average_pixel_values <= max_pixel_value, axis=1)
+        if self.sampled is not None:
+            mask &= self.sampled
+        return _restore(self.y0[mask], 6)
+
+    def to_items(self) -> List[Dict[str, Any]]:
+        """Convert the lines back to the nested dict format."""
+        x0, y0, x1, y1 = (
+            _restore(column, 6) for column in (self.x0, self.y0, self.x1, self.y1)
+        )
+        lines: List[Dict[str, Any]] = [
+            {
+                "decimal_coordinates": {
+                    "top_left": {"x": left, "y": top},
+                    "bottom_right": {"x": right, "y": bottom},
+                }
+            }
+            for left, top, right, bottom in zip(x0, y0, x1, y1)
+        ]
+        if self.average_pixel_values is not None:
+            for index, (line, average_pixel_value) in enumerate(
+                zip(lines, self.average_pixel_values.tolist())
+            ):
+                if self.sampled is None or self.sampled[index]:
+                    line["average_pixel_value"] = average_pixel_value
+        return lines
+
+
+def to_columnar_pdf_data(pdf_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert pdf_data in the dict format to the compact columnar format."""
+    return {
+        **pdf_data,
+        "pages": [
+            {
+                **page,
+                "content": ColumnarWords.from_items(page["content"]),
+                "lines": ColumnarLines.from_items(page["lines"]),
+            }
+            for page in pdf_data["pages"]
+        ],
+    }
+
+
+def to_dict_pdf_data(pdf_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert columnar pdf_data back to the JSON serialisable dict format."""
+    pages = []
+    for page in pdf_data["pages"]:
+        content, lines = page["content"], page["lines"]
+        pages.append(
+            {
+                **page,
+                "content": (
+                    content.to_items()
+                    if isinstance(content, ColumnarWords)
+                    else content
+                ),
+                "lines": (
+                    lines.to_items() if isinstance(lines, ColumnarLines) else lines
+                ),
+            }
+        )
+    return {**pdf_data, "pages": pages}
@@ -1,21 +1,80 @@
-import json
-import os
+import asyncio
 import uuid
-from jsonschema import validate
+from contextlib import nullcontext
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
+from pdf_parser.document import LazyDocument
 from pdf_parser.forms import FormProcessor
+from pdf_parser.instrumentation import (
+    NO_INSTRUMENTATION,
+    DocumentProfiler,
+    Instrumentation,
+)
+from pdf_parser.ocr import OcrEngine
+from pdf_parser.planner import PagePlanner
 from pdf_parser.extractors import TextExtractor
 from pdf_parser.coordinate_utils import CoordinateUtils
-from pdf_parser.tables import TableProcessor, TableSplitter
+from pdf_parser.tables import (
+    TableContinuation,
+    TableEngine,
+    TableProcessor,
+    TableSplitter,
+)
 from pdf_parser.pydantic_models import Document
+from pdf_parser.raster import RasterStore, RegionRenderer, RenderProfile
+from pdf_parser.template import CompiledTemplate
 
 
 class Parser:
-    def __init__(self) -> None:
+    # OCR boxes closer than this, in decimal coordinates, are rendered as one
+    # region
+    ocr_region_gap = 0.02
+
+    def __init__(
+        self,
+        ocr_engine: Optional[OcrEngine] = None,
+        instrumentation: Optional[Instrumentation] = None,
+    ) -> None:
+        self.instrumentation = instrumentation or NO_INSTRUMENTATION
         self.coordinate_utils = CoordinateUtils()
-        self.text_extractor = TextExtractor(self.coordinate_utils)
+        self.text_extractor = TextExtractor(
+            self.coordinate_utils, ocr_engine, self.instrumentation
+        )
+        self.form_processor = FormProcessor(self)
+        self.page_planner = PagePlanner(self)
+        self.table_engine = TableEngine()
+        self._table_template: Optional[Dict[str, Any]] = None
+        self._table_processor: Optional[TableProcessor] = None
+        self._table_splitter: Optional[TableSplitter] = None
+
+    def get_table_components(
+        self, template: Dict[str, Any]
+    ) -> Tuple[TableProcessor, TableSplitter]:
+        """Get the table processor and splitter for a template.
+
+        Both are reused for as long as the same template is being parsed.
+        """
+        if (
+            self._table_template is not template
+            or self._table_processor is None
+            or self._table_splitter is None
+        ):
+            self._table_template = template
+            self._table_processor = TableProcessor(template, self.coordinate_utils)
+            self._table_splitter = TableSplitter(template, self.coordinate_utils)
+        return self._table_processor, self._table_splitter
 
     def page_number_converter(
         self, page_numbers: str, number_of_pages: int
@@ -56,9 +115,10 @@ class Parser:
         page_content: List[Dict[str, Any]],
         coordinates: Optional[Dict[str, Dict[str, float]]],
         extraction_method: str,
-        jpg_bytes_page: bytes,
+        jpg_bytes_page: Optional[bytes],
         search_type: Optional[str] = None,
         regex: Optional[str] = None,
+        ocr_mode: str = "region",
     ) -> str:
         return self.text_extractor.get_text_from_page(
             page_content,
@@ -67,6 +127,7 @@ class Parser:
             jpg_bytes_page,
             search_type=search_type,
             regex=regex,
+            ocr_mode=ocr_mode,
         )
 
     def get_output_data_from_form_rule(
@@ -75,10 +136,9 @@ class Parser:
         page_index: int,
         pdf_data: Dict[str, Any],
         template: Dict[str, Any],
-        jpg_bytes: List[bytes],
+        jpg_bytes: Sequence[bytes],
     ) -> Dict[str, str]:
-        form_processor = FormProcessor(self)
-        return form_processor.get_output_data_from_form_rule(
+        return self.form_processor.get_output_data_from_form_rule(
             form_rule_id,
             page_index,
             pdf_data,
@@ -86,112 +146,516 @@ class Parser:
             jpg_bytes,
         )
 
-    def get_output_data_from_table_rule(
+    def get_table_column_boxes(
         self,
         table_rule_id: str,
-        page_index: int,
-        pdf_data: Dict[str, Any],
+        page: Dict[str, Any],
         template: Dict[str, Any],
-        jpg_bytes: List[bytes],
-    ) -> List[Dict[str, Any]]:
-        table_processor = TableProcessor(template)
-        table_splitter = TableSplitter(template)
+    ) -> List[Tuple[str, List[Dict[str, Any]]]]:
+        """Split each column of a table into its row boxes for a page."""
+        table_processor, table_splitter = self.get_table_components(template)
         table_rule = self.get_rule_from_id(table_rule_id, template)
         delimiter_field_name = table_rule["config"]["row_delimiter"]["field_name"]
         delimiter_type = table_rule["config"]["row_delimiter"]["type"]
         processed_columns = table_processor.process_table_data(
             table_rule,
-            pdf_data["pages"][page_index],
+            page,
             delimiter_field_name,
             delimiter_type,
         )
 
-        data: Dict[int, Dict[str, str]] = {}
+        return [
+            (
+                column["field_name"],
+                table_splitter.split_bounding_box_by_lines(
+                    column["coordinates"], column["lines_y_coordinates"]
+                ),
+            )
+            for column in processed_columns
+        ]
 
-        jpg_bytes_page = jpg_bytes[page_index]
+    @staticmethod
+    def get_cells_from_column_boxes(
+        column_boxes: List[Tuple[str, List[Dict[str, Any]]]]
+    ) -> List[Tuple[int, str, Dict[str, Any]]]:
+        """Flatten column row boxes into (row index, field name, box) cells."""
+        return [
+            (row_index, field_name, box)
+            for field_name, split_boxes in column_boxes
+            for row_index, box in enumerate(split_boxes)
+        ]
 
-        extraction_method = template["extraction_method"]
-        for column in processed_columns:
-            split_boxes = table_splitter.split_bounding_box_by_lines(
-                column["coordinates"], column["lines_y_coordinates"]
-            )
-            for row_index, box in enumerate(split_boxes):
-                text_value = self.get_text_from_page(
-                    pdf_data["pages"][page_index]["content"],
-                    box,
-                    extraction_method,
-                    jpg_bytes_page,
-                )
-                if row_index not in data:
-                    data[row_index] = {}
-                data[row_index][column["field_name"]] = text_value
+    def get_table_cells(
+        self,
+        table_rule_id: str,
+        page: Dict[str, Any],
+        template: Dict[str, Any],
+    ) -> List[Tuple[int, str, Dict[str, Any]]]:
+        """Split a table into (row index, field name, box) cells for a page."""
+        return self.get_cells_from_column_boxes(
+            self.get_table_column_boxes(table_rule_id, page, template)
+        )
+
+    def get_texts_from_column_boxes(
+        self,
+        page_content: Any,
+        column_boxes: List[Tuple[str, List[Dict[str, Any]]]],
+    ) -> List[str]:
+        """Get the text of every cell of a table, in cell order, in one pass."""
+        spatial_index = self.coordinate_utils.get_spatial_index(page_content)
+        cell_indexes = self.table_engine.get_cell_indexes(
+            spatial_index, [split_boxes for _, split_boxes in column_boxes]
+        )
+        return [
+            self.text_extractor.get_text_from_indexes(page_content, indexes)
+            for column_indexes in cell_indexes
+            for indexes in column_indexes
+        ]
+
+    @staticmethod
+    def get_rows_from_cells(
+        cells: List[Tuple[int, str, Dict[str, Any]]], text_values: List[str]
+    ) -> List[Dict[str, Any]]:
+        data: Dict[int, Dict[str, str]] = {}
+        for (row_index, field_name, _), text_value in zip(cells, text_values):
+            if row_index not in data:
+                data[row_index] = {}
+            data[row_index][field_name] = text_value
 
         # Convert the dictionary to a list of values ordered by row_index
         ordered_data = [data[row_index] for row_index in sorted(data.keys())]
 
         return ordered_data
 
+    def get_output_data_from_table_rule(
+        self,
+        table_rule_id: str,
+        page_index: int,
+        pdf_data: Dict[str, Any],
+        template: Dict[str, Any],
+        jpg_bytes: Sequence[bytes],
+    ) -> List[Dict[str, Any]]:
+        column_boxes = self.get_table_column_boxes(
+            table_rule_id, pdf_data["pages"][page_index], template
+        )
+        cells = self.get_cells_from_column_boxes(column_boxes)
+
+        extraction_method = template["extraction_method"]
+        ocr_mode = template.get("ocr_mode", "region")
+        jpg_bytes_page = jpg_bytes[page_index] if extraction_method == "ocr" else None
+
+        if extraction_method == "extraction":
+            text_values = self.get_texts_from_column_boxes(
+                pdf_data["pages"][page_index]["content"], column_boxes
+            )
+        elif extraction_method == "ocr" and jpg_bytes_page is None:
+            raise ValueError("OCR extraction requires the page image")
+        elif extraction_method == "ocr" and ocr_mode == "page":
+            text_values = self.get_texts_from_column_boxes(
+                self.text_extractor.get_ocr_words(jpg_bytes_page, page_index + 1),
+                column_boxes,
+            )
+        elif extraction_method == "ocr":
+            # Send every cell to the OCR engine at once so they run concurrently
+            text_values = self.text_extractor.get_texts_from_ocr(
+                jpg_bytes_page, [box for _, _, box in cells], page_index + 1
+            )
+        else:
+            text_values = ["" for _ in cells]
+
+        return self.get_rows_from_cells(cells, text_values)
+
     @staticmethod
     def parse_pdf(
-        template: Dict[str, Any], pdf_data: Dict[str, Any], jpg_bytes: List[bytes]
+        template: Union[Dict[str, Any], CompiledTemplate],
+        pdf_data: Dict[str, Any],
+        jpg_bytes: Sequence[bytes],
     ) -> Dict[str, Any]:
+        """Parse extracted PDF data with a template.
 
-        schema_path = os.path.join(
-            os.path.dirname(__file__),
-            "schema",
-            "template_json_schema.json",
-        )
+        Pass a CompiledTemplate to skip validating and indexing the template on
+        every call.
+        """
+        return Parser().parse_data(template, pdf_data, jpg_bytes)
 
-        if not os.path.exists(schema_path):
-            raise FileNotFoundError(f"Schema file not found: {schema_path}")
+    def plan_page_rules(
+        self, template: Dict[str, Any], number_of_pages: int
+    ) -> Tuple[List[Tuple[int, str, str, int]], Dict[int, List[Tuple[str, str]]]]:
+        """List the (page index, rule type, rule id, page rule index) steps of a
+        template in output order, and the distinct rules to evaluate on each
+        page."""
+        steps = []
+        rules_by_page: Dict[int, List[Tuple[str, str]]] = {}
+        for page_rule_index, page_rule in enumerate(template["pages"]):
+            page_indexes = self.page_number_converter(
+                page_rule["page_numbers"], number_of_pages
+            )
+            for page_index in page_indexes:
+                page_rules = rules_by_page.setdefault(page_index, [])
+                for rule_type in ("form", "table"):
+                    for rule_id in page_rule.get(rule_type + "s", []):
+                        steps.append((page_index, rule_type, rule_id, page_rule_index))
+                        if (rule_type, rule_id) not in page_rules:
+                            page_rules.append((rule_type, rule_id))
+        return steps, rules_by_page
 
-        with open(schema_path) as schema_file:
-            template_json_schema = json.load(schema_file)
+    def get_ocr_regions(
+        self, template: Dict[str, Any], number_of_pages: int
+    ) -> Dict[int, List[Dict[str, Dict[str, float]]]]:
+        """Get the regions region OCR reads on each page.
 
-        validate(instance=template, schema=template_json_schema)
+        The boxes are every form's coordinates and every table column, so all
+        of a table's cells are inside them, and boxes closer than
+        ocr_region_gap are merged into one region. Regex forms read the
+        extracted text and need no pixels. Empty unless the template OCRs
+        regions.
+        """
+        if (
+            template["extraction_method"] != "ocr"
+            or template.get("ocr_mode", "region") == "page"
+        ):
+            return {}
+        _, rules_by_page = self.plan_page_rules(template, number_of_pages)
+        regions = {}
+        for page_index, page_rules in rules_by_page.items():
+            boxes = []
+            for rule_type, rule_id in page_rules:
+                try:
+                    config = self.get_rule_from_id(rule_id, template)["config"]
+                except IndexError:
+                    continue
+                if rule_type == "table":
+                    boxes.extend(column["coordinates"] for column in config["columns"])
+                elif config.get("coordinates") is not None and not (
+                    config.get("search_type") == "regex" and config.get("regex")
+                ):
+                    boxes.append(config["coordinates"])
+            if boxes:
+                regions[page_index] = self.coordinate_utils.merge_nearby_boxes(
+                    boxes, self.ocr_region_gap
+                )
+        return regions
+
+    def collect_results(
+        self,
+        template: Dict[str, Any],
+        steps: List[Tuple[int, str, str, int]],
+        results: Dict[int, Dict[Tuple[str, str], Any]],
+        continuations: Dict[Tuple[int, str], TableContinuation],
+    ) -> Tuple[
+        List[Dict[str, str]],
+        List[Dict[str, Any]],
+        Dict[Tuple[int, str], Dict[str, Any]],
+    ]:
+        """Gather evaluated rules into forms and tables in step order.
 
+        A table rule with a continuation config gets one table per page rule,
+        added where its first page would be. Its continuation is kept in
+        continuations, keyed by (page rule index, rule id), and the tables it
+        added are also returned by that key so the caller can finish them.
+        """
         forms = []
         tables = []
+        continued_tables: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        for page_index, rule_type, rule_id, page_rule_index in steps:
+            result = results[page_index][(rule_type, rule_id)]
+            if isinstance(result, IndexError):
+                print(
+                    f"Rule ID '{rule_id}' not found in template rules or page index '{page_index}' is out of range."
+                )
+            elif rule_type == "form":
+                forms.append(result)
+            else:
+                config = self.get_rule_from_id(rule_id, template)["config"]
+                if "continuation" not in config:
+                    tables.append({"data": result})
+                    continue
+                key = (page_rule_index, rule_id)
+                if key not in continuations:
+                    continuations[key] = TableContinuation(
+                        config["row_delimiter"]["field_name"], config["continuation"]
+                    )
+                if key not in continued_tables:
+                    continued_tables[key] = {"rule_id": rule_id, "data": []}
+                    tables.append(continued_tables[key])
+                continued_tables[key]["data"].extend(
+                    continuations[key].add_page(result)
+                )
+        return forms, tables, continued_tables
+
+    def parse_data(
+        self,
+        template: Union[Dict[str, Any], CompiledTemplate],
+        pdf_data: Dict[str, Any],
+        jpg_bytes: Sequence[bytes],
+        profiler: Optional[DocumentProfiler] = None,
+    ) -> Dict[str, Any]:
+        """Parse extracted PDF data with a template, using this parser's components.
+
+        When the parser's instrumentation records timings, they are added to the
+        output metadata as "timings". Pass a profiler to profile this document.
+        """
+        try:
+            return self._parse_data(template, pdf_data, jpg_bytes, profiler)
+        finally:
+            self.release_document()
+
+    def _parse_data(
+        self,
+        template: Union[Dict[str, Any], CompiledTemplate],
+        pdf_data: Dict[str, Any],
+        jpg_bytes: Sequence[bytes],
+        profiler: Optional[DocumentProfiler],
+    ) -> Dict[str, Any]:
+        with self.instrumentation.document(), profiler or nullcontext():
+            with self.instrumentation.span("compile_template"):
+                template = CompiledTemplate.compile(template)
+
+            number_of_pages = len(pdf_data["pages"])
+
+            # Plan every rule for each page first, so a page's form boxes are
+            # swept once and its tables share one spatial index, then emit the
+            # results in template order.
+            steps, rules_by_page = self.plan_page_rules(template, number_of_pages)
+            results = {}
+            for page_index, page_rules in rules_by_page.items():
+                results[page_index] = self.page_planner.evaluate_page(
+                    template, page_index, page_rules, pdf_data, jpg_bytes
+                )
+                self.release_page(page_index, pdf_data)
+            continuations: Dict[Tuple[int, str], TableContinuation] = {}
+            forms, tables, continued_tables = self.collect_results(
+                template, steps, results, continuations
+            )
+            for key, table in continued_tables.items():
+                table["data"].extend(continuations[key].finish())
+
+            output = {
+                "metadata": {
+                    "document_id": str(uuid.uuid4()),
+                    "parsed_at": datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+                    "number_of_pages": number_of_pages,
+                },
+                "pages": [{"forms": forms, "tables": tables}],
+            }
+
+            with self.instrumentation.span("validate_output"):
+                output_document = Document(**output)
+
+            timings = self.instrumentation.report()
+            if timings is not None:
+                output_document.metadata.timings = timings
+
+            # Leave "timings" out unless it was set
+            return output_document.model_dump_json(exclude_unset=True)
+
+    def iter_pages(
+        self,
+        template: Union[Dict[str, Any], CompiledTemplate],
+        pdf_data: Dict[str, Any],
+        jpg_bytes: Sequence[bytes],
+        on_page_done: Optional[Callable[[int], None]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Parse extracted PDF data one page at a time.
+
+        Yields the page number and the forms and tables found on each page the
+        template reads, in page order. Within a page, results follow the
+        template order. Tables with a continuation config carry their rule_id
+        and the rows completed on that page, and "continues" is False once the
+        page rule's last page is done. on_page_done is called with each page
+        index once its results have been yielded, so its data can be released.
+        """
+        try:
+            with self.instrumentation.document():
+                yield from self._iter_pages(template, pdf_data, jpg_bytes, on_page_done)
+        finally:
+            self.release_document()
+
+    def _iter_pages(
+        self,
+        template: Union[Dict[str, Any], CompiledTemplate],
+        pdf_data: Dict[str, Any],
+        jpg_bytes: Sequence[bytes],
+        on_page_done: Optional[Callable[[int], None]],
+    ) -> Iterator[Dict[str, Any]]:
+        with self.instrumentation.span("compile_template"):
+            template = CompiledTemplate.compile(template)
         number_of_pages = len(pdf_data["pages"])
+        steps, rules_by_page = self.plan_page_rules(template, number_of_pages)
+        last_page_indexes: Dict[int, int] = {}
+        for page_index, _, _, page_rule_index in steps:
+            last_page_indexes[page_rule_index] = max(
+                page_index, last_page_indexes.get(page_rule_index, page_index)
+            )
+        continuations: Dict[Tuple[int, str], TableContinuation] = {}
 
-        for page_rule in template["pages"]:
-            page_indexes = Parser().page_number_converter(
-                page_rule["page_numbers"], number_of_pages
+        for page_index in sorted(rules_by_page):
+            results = {
+                page_index: self.page_planner.evaluate_page(
+                    template,
+                    page_index,
+                    rules_by_page[page_index],
+                    pdf_data,
+                    jpg_bytes,
+                )
+            }
+            forms, tables, continued_tables = self.collect_results(
+                template,
+                [step for step in steps if step[0] == page_index],
+                results,
+                continuations,
             )
-            for page_index in page_indexes:
-                if "forms" in page_rule and len(page_rule["forms"]) > 0:
-                    for rule_id in page_rule["forms"]:
-                        try:
-                            form = Parser().get_output_data_from_form_rule(
-                                rule_id, page_index, pdf_data, template, jpg_bytes
-                            )
-                            forms.append(form)
-                        except IndexError:
-                            print(
-                                f"Rule ID '{rule_id}' not found in template rules or page index '{page_index}' is out of range."
-                            )
-                if "tables" in page_rule and len(page_rule["tables"]) > 0:
-                    for rule_id in page_rule["tables"]:
-                        try:
-                            table_data = Parser().get_output_data_from_table_rule(
-                                rule_id, page_index, pdf_data, template, jpg_bytes
-                            )
-
-                            tables.append({"data": table_data})
-                        except IndexError:
-                            print(
-                                f"Rule ID '{rule_id}' not found in template rules or page index '{page_index}' is out of range."
-                            )
-
-        output = {
-            "metadata": {
-                "document_id": str(uuid.uuid4()),
-                "parsed_at": datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
-                "number_of_pages": number_of_pages,
-            },
-            "pages": [{"forms": forms, "tables": tables}],
+            for key, continuation in continuations.items():
+                finished = page_index == last_page_indexes[key[0]]
+                if key not in continued_tables:
+                    if not finished or continuation.pending_row is None:
+                        continue
+                    # The last page failed, so flush the held row on its own
+                    continued_tables[key] = {"rule_id": key[1], "data": []}
+                    tables.append(continued_tables[key])
+                continued_tables[key]["continues"] = not finished
+                if finished:
+                    continued_tables[key]["data"].extend(continuation.finish())
+            yield {"page_number": page_index + 1, "forms": forms, "tables": tables}
+
+            self.release_page(page_index, pdf_data)
+            if on_page_done is not None:
+                on_page_done(page_index)
+
+    def release_page(self, page_index: int, pdf_data: Dict[str, Any]) -> None:
+        """Drop the index and OCR words cached for a page that is done."""
+        try:
+            self.coordinate_utils.release_spatial_index(
+                pdf_data["pages"][page_index]["content"]
+            )
+        except IndexError:
+            pass
+        # Pages are parsed one at a time, so only this page's words are cached
+        self.text_extractor.clear_ocr_words()
+
+    def release_document(self) -> None:
+        """Drop everything cached for a document that is done."""
+        self.coordinate_utils.clear_spatial_indexes()
+        self.text_extractor.clear_ocr_words()
+
+    @staticmethod
+    def parse_pdf_bytes(
+        template: Union[Dict[str, Any], CompiledTemplate], pdf_bytes: bytes
+    ) -> Dict[str, Any]:
+        """Parse a PDF, only extracting and rendering the pages the template uses."""
+        return ParserSession(template).parse(pdf_bytes)
+
+
+class ParserSession:
+    """A long-lived parser for one template.
+
+    The template is compiled once, and the parser, its form and table
+    processors and the OCR engine are reused for every document, so a worker
+    can parse many documents without any per-document setup.
+    """
+
+    def __init__(
+        self,
+        template: Union[Dict[str, Any], CompiledTemplate],
+        ocr_engine: Optional[OcrEngine] = None,
+        compact: bool = False,
+        instrumentation: Optional[Instrumentation] = None,
+        raster_options: Optional[Dict[str, Any]] = None,
+        render_profiles: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> None:
+        self.template = CompiledTemplate.compile(template)
+        self.parser = Parser(ocr_engine, instrumentation)
+        self.compact = compact
+        # Keyword arguments for a RasterStore per document, when pages should
+        # be kept as decoded arrays rather than JPEG bytes
+        self.raster_options = raster_options
+        # Render profiles by purpose, overriding the template's
+        requirements = self.template.requirements
+        self.render_profiles = {
+            "line_sampling": requirements.line_sampling_profile,
+            "ocr": requirements.ocr_profile,
         }
+        for purpose, config in (render_profiles or {}).items():
+            self.render_profiles[purpose] = RenderProfile.from_config(config)
+
+    def open_document(self, pdf_bytes: bytes) -> LazyDocument:
+        document = LazyDocument(
+            pdf_bytes,
+            compact=self.compact,
+            template=self.template,
+            instrumentation=self.parser.instrumentation,
+            raster_store=self.create_raster_store(pdf_bytes),
+            render_profiles=self.render_profiles,
+        )
+        if self.render_profiles["ocr"].clip_to_regions:
+            # Without PyMuPDF whole pages are rendered as usual
+            if RegionRenderer.is_available():
+                document.ocr_regions = self.parser.get_ocr_regions(
+                    self.template, document.number_of_pages
+                )
+        return document
+
+    def create_raster_store(self, pdf_bytes: bytes) -> Optional[RasterStore]:
+        """A raster store for a document, rendering with the OCR profile unless
+        raster_options says otherwise."""
+        if self.raster_options is None:
+            return None
+        ocr_profile = self.render_profiles["ocr"]
+        return RasterStore(
+            pdf_bytes,
+            **{
+                "dpi": ocr_profile.dpi,
+                "grayscale": ocr_profile.grayscale,
+                "thread_count": ocr_profile.thread_count,
+                **self.raster_options,
+            },
+        )
 
-        output_document = Document(**output)
+    def parse(
+        self,
+        document: Union[bytes, LazyDocument],
+        profiler: Optional[DocumentProfiler] = None,
+    ) -> Dict[str, Any]:
+        """Parse PDF bytes or an open LazyDocument, profiling it if a profiler
+        is given."""
+        if isinstance(document, LazyDocument):
+            return self.parser.parse_data(
+                self.template, document.pdf_data, document.jpg_bytes, profiler
+            )
+        with self.open_document(document) as lazy_document:
+            return self.parse(lazy_document, profiler)
+
+    def iter_pages(
+        self, document: Union[bytes, LazyDocument]
+    ) -> Iterator[Dict[str, Any]]:
+        """Parse PDF bytes or an open LazyDocument page by page.
+
+        Each page's extracted data and page image are released as soon as its
+        results have been yielded, so memory does not grow with the document.
+        """
+        if isinstance(document, LazyDocument):
+            yield from self.parser.iter_pages(
+                self.template,
+                document.pdf_data,
+                document.jpg_bytes,
+                on_page_done=document.release_page,
+            )
+            return
+        with self.open_document(document) as lazy_document:
+            yield from self.iter_pages(lazy_document)
 
-        return output_document.model_dump_json()
+    async def aiter_pages(
+        self, document: Union[bytes, LazyDocument]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Async version of iter_pages. Pages are parsed in the default executor
+        so the event loop is not blocked."""
+        loop = asyncio.get_running_loop()
+        pages = self.iter_pages(document)
+        try:
+            while True:
+                page = await loop.run_in_executor(None, next, pages, None)
+                if page is None:
+                    return
+                yield page
+        finally:
+            pages.close()
@@ -0,0 +1,226 @@
+import heapq
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from pdf_parser.coordinate_utils import SpatialIndex
+
+
+class PagePlan:
+    """Collects the form boxes a template reads on one page, and the table
+    cell boxes when they are OCRed, so words can be assigned to all of them in
+    a single sweep. Table cells read from words are assigned by TableEngine.
+    """
+
+    def __init__(self, threshold: float = 0.005) -> None:
+        self.threshold = threshold
+        self.boxes: List[Dict[str, Dict[str, float]]] = []
+
+    def add_box(self, box_coordinates: Dict[str, Dict[str, float]]) -> int:
+        """Add a box to the plan, returning its id."""
+        self.boxes.append(box_coordinates)
+        return len(self.boxes) - 1
+
+    def assign(self, spatial_index: SpatialIndex) -> List[np.ndarray]:
+        """Find the indexes of the words inside every box, in original order.
+
+        Words are swept by top y. A box becomes active once the sweep reaches
+        its top edge and is retired when the sweep passes its bottom edge, so
+        each word is only tested against the boxes that overlap it in y. The
+        containment test and threshold match CoordinateUtils.
+        """
+        threshold = self.threshold
+        number_of_boxes = len(self.boxes)
+        lefts = [box["top_left"]["x"] - threshold for box in self.boxes]
+        tops = [box["top_left"]["y"] - threshold for box in self.boxes]
+        rights = [box["bottom_right"]["x"] + threshold for box in self.boxes]
+        bottoms = [box["bottom_right"]["y"] + threshold for box in self.boxes]
+        box_order = sorted(range(number_of_boxes), key=tops.__getitem__)
+
+        x0 = spatial_index.x0.tolist()
+        y0 = spatial_index.y0.tolist()
+        x1 = spatial_index.x1.tolist()
+        y1 = spatial_index.y1.tolist()
+
+        matches: List[List[int]] = [[] for _ in range(number_of_boxes)]
+        active: List[tuple] = []
+        next_box = 0
+        for word in spatial_index.sorted_indexes.tolist():
+            top = y0[word]
+            while next_box < number_of_boxes and tops[box_order[next_box]] <= top:
+                box_id = box_order[next_box]
+                heapq.heappush(active, (bottoms[box_id], box_id))
+                next_box += 1
+            while active and active[0][0] < top:
+                heapq.heappop(active)
+            for bottom, box_id in active:
+                if (
+                    x0[word] >= lefts[box_id]
+                    and x1[word] <= rights[box_id]
+                    and y1[word] <= bottom
+                ):
+                    matches[box_id].append(word)
+
+        # Words whose bottom is above their top are outside the sweep order
+        for word in spatial_index.irregular_indexes.tolist():
+            for box_id in range(number_of_boxes):
+                if (
+                    y0[word] >= tops[box_id]
+                    and x0[word] >= lefts[box_id]
+                    and x1[word] <= rights[box_id]
+                    and y1[word] <= bottoms[box_id]
+                ):
+                    matches[box_id].append(word)
+
+        return [np.array(sorted(words), dtype=np.int64) for words in matches]
+
+
+class PagePlanner:
+    """Evaluates every form and table rule a template applies to a page at once.
+
+    Form boxes are gathered into one PagePlan and the page's words are assigned
+    to all of them in a single sweep. Table cells are not part of that sweep:
+    each table's cells are filled in one vectorised pass by the parser's
+    TableEngine, against the page's shared spatial index. With region OCR
+    every form and cell box on the page is sent to the OCR engine as one batch
+    instead.
+    """
+
+    def __init__(self, parser: Any) -> None:
+        self.parser = parser
+
+    def evaluate_page(
+        self,
+        template: Dict[str, Any],
+        page_index: int,
+        rules: List[Tuple[str, str]],
+        pdf_data: Dict[str, Any],
+        jpg_bytes: Sequence[bytes],
+    ) -> Dict[Tuple[str, str], Any]:
+        """Get the output of each (rule type, rule id) on a page.
+
+        A rule whose id is unknown, or a page that is out of range, maps to the
+        IndexError that parsing it alone would have raised.
+        """
+        with self.parser.instrumentation.span("evaluate_page", page=page_index + 1):
+            return self._evaluate_page(template, page_index, rules, pdf_data, jpg_bytes)
+
+    def _evaluate_page(
+        self,
+        template: Dict[str, Any],
+        page_index: int,
+        rules: List[Tuple[str, str]],
+        pdf_data: Dict[str, Any],
+        jpg_bytes: Sequence[bytes],
+    ) -> Dict[Tuple[str, str], Any]:
+        instrumentation = self.parser.instrumentation
+        extraction_method = template["extraction_method"]
+        ocr_mode = template.get("ocr_mode", "region")
+        try:
+            page = pdf_data["pages"][page_index]
+            jpg_bytes_page = (
+                jpg_bytes[page_index] if extraction_method == "ocr" else None
+            )
+        except IndexError as error:
+            return {rule: error for rule in rules}
+        region_ocr = extraction_method == "ocr" and ocr_mode != "page"
+
+        results: Dict[Tuple[str, str], Any] = {}
+        plan = PagePlan()
+        forms = []
+        tables = []
+        for rule in rules:
+            rule_type, rule_id = rule
+            try:
+                if rule_type == "form":
+                    config = self.parser.get_rule_from_id(rule_id, template)["config"]
+                    coordinates = config.get("coordinates")
+                    search_type = config.get("search_type")
+                    regex = config.get("regex")
+                    if (search_type == "regex" and regex) or coordinates is None:
+                        results[rule] = {
+                            config["field_name"]: self.parser.get_text_from_page(
+                                page["content"],
+                                coordinates,
+                                extraction_method,
+                                jpg_bytes_page,
+                                search_type=search_type,
+                                regex=regex,
+                                ocr_mode=ocr_mode,
+                            )
+                        }
+                    else:
+                        forms.append(
+                            (rule, config["field_name"], plan.add_box(coordinates))
+                        )
+                else:
+                    column_boxes = self.parser.get_table_column_boxes(
+                        rule_id, page, template
+                    )
+                    cells = self.parser.get_cells_from_column_boxes(column_boxes)
+                    box_ids = (
+                        [plan.add_box(box) for _, _, box in cells] if region_ocr else []
+                    )
+                    tables.append((rule, column_boxes, cells, box_ids))
+            except IndexError as error:
+                results[rule] = error
+
+        if not plan.boxes and not any(cells for _, _, cells, _ in tables):
+            words = None
+        elif extraction_method == "extraction":
+            words = page["content"]
+        elif extraction_method == "ocr":
+            if jpg_bytes_page is None:
+                raise ValueError("OCR extraction requires the page image")
+            if region_ocr:
+                words = None
+            else:
+                words = self.parser.text_extractor.get_ocr_words(
+                    jpg_bytes_page, page_index + 1
+                )
+        else:
+            words = None
+
+        texts = self.get_texts(
+            plan, words, jpg_bytes_page if region_ocr else None, page_index + 1
+        )
+        for rule, field_name, box_id in forms:
+            results[rule] = {field_name: texts[box_id]}
+        for rule, column_boxes, cells, box_ids in tables:
+            with instrumentation.span(
+                "table_assembly", page=page_index + 1, rule_id=rule[1]
+            ):
+                if region_ocr:
+                    text_values = [texts[box_id] for box_id in box_ids]
+                elif words is None:
+                    text_values = ["" for _ in cells]
+                else:
+                    text_values = self.parser.get_texts_from_column_boxes(
+                        words, column_boxes
+                    )
+                results[rule] = self.parser.get_rows_from_cells(cells, text_values)
+            instrumentation.count("table_rows", len(results[rule]))
+        return results
+
+    def get_texts(
+        self,
+        plan: PagePlan,
+        words: Any,
+        jpg_bytes_page: Optional[bytes],
+        page: Optional[int] = None,
+    ) -> List[str]:
+        """Get the text inside every box of a plan, by OCRing each box when a
+        page image is given and by sweeping the words otherwise."""
+        if not plan.boxes:
+            return []
+        text_extractor = self.parser.text_extractor
+        if jpg_bytes_page is not None:
+            return text_extractor.get_texts_from_ocr(jpg_bytes_page, plan.boxes, page)
+        if words is None:
+            return ["" for _ in plan.boxes]
+
+        spatial_index = self.parser.coordinate_utils.get_spatial_index(words)
+        return [
+            text_extractor.get_text_from_indexes(words, indexes)
+            for indexes in plan.assign(spatial_index)
+        ]
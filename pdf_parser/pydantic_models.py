@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, RootModel
 
@@ -7,9 +7,12 @@ class Metadata(BaseModel):
     document_id: str
     parsed_at: str
     number_of_pages: int
+    timings: Optional[Dict[str, Any]] = None
 
 
 class Table(BaseModel):
+    # Only set on tables with a continuation config
+    rule_id: Optional[str] = None
     data: List[RootModel]
 
 
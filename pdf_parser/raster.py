@@ -0,0 +1,498 @@
+import io
+import math
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from pdf2image import convert_from_bytes
+from PIL import Image
+
+
+class RenderProfile:
+    """How pages are rendered for one purpose: the resolution, whether to
+    render in grayscale, and the number of threads pdf2image may use.
+
+    pdf2image splits a render's pages between its threads, so thread_count
+    only speeds up renders of several pages, as DataExtractor.extract_data
+    does. LazyDocument, RasterStore and RegionRenderer render one page at a
+    time and are not affected by it.
+    """
+
+    def __init__(
+        self,
+        dpi: int = 200,
+        grayscale: bool = False,
+        thread_count: int = 1,
+        clip_to_regions: bool = False,
+    ) -> None:
+        self.dpi = dpi
+        self.grayscale = grayscale
+        self.thread_count = thread_count
+        # Only used for OCR: render just the template's boxes on each page
+        self.clip_to_regions = clip_to_regions
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "RenderProfile":
+        """Build a profile from a template's render_profiles entry."""
+        return cls(**(config or {}))
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, RenderProfile) and vars(self) == vars(other)
+
+    def __repr__(self) -> str:
+        return (
+            f"RenderProfile(dpi={self.dpi}, grayscale={self.grayscale}, "
+            f"thread_count={self.thread_count}, "
+            f"clip_to_regions={self.clip_to_regions})"
+        )
+
+    def render(
+        self,
+        pdf_bytes: bytes,
+        first_page: Optional[int] = None,
+        last_page: Optional[int] = None,
+    ) -> List[Image.Image]:
+        """Render pages first_page to last_page (inclusive, from 1)."""
+        return convert_from_bytes(
+            pdf_bytes,
+            dpi=self.dpi,
+            first_page=first_page,
+            last_page=last_page,
+            grayscale=self.grayscale,
+            thread_count=self.thread_count,
+        )
+
+
+class PageRaster:
+    """A page image decoded once into a NumPy array of RGB pixels, or of
+    luminance values for a grayscale page."""
+
+    def __init__(self, pixels: np.ndarray) -> None:
+        self.pixels = pixels
+        self.height, self.width = pixels.shape[:2]
+        # Pixels with a channel axis, so grayscale pages are sampled like RGB
+        self._channel_pixels = pixels[:, :, None] if pixels.ndim == 2 else pixels
+        self._channels = self._channel_pixels.shape[2]
+
+    @classmethod
+    def from_jpg_bytes(cls, jpg_bytes: bytes) -> "PageRaster":
+        image = Image.open(io.BytesIO(jpg_bytes))
+        return cls.from_image(image, grayscale=image.mode == "L")
+
+    @classmethod
+    def from_image(cls, image: Image.Image, grayscale: bool = False) -> "PageRaster":
+        return cls(np.asarray(image.convert("L" if grayscale else "RGB")))
+
+    @classmethod
+    def from_page_image(cls, page_image: Any) -> "PageRaster":
+        """Get a raster for JPEG bytes, a PIL image or a raster."""
+        if isinstance(page_image, RegionRasterSet):
+            raise ValueError("A RegionRasterSet only holds regions of its page")
+        if isinstance(page_image, PageRaster):
+            return page_image
+        if isinstance(page_image, Image.Image):
+            return cls.from_image(page_image)
+        return cls.from_jpg_bytes(page_image)
+
+    @property
+    def grayscale(self) -> bool:
+        return self.pixels.ndim == 2
+
+    def crop(self, coordinates: Dict[str, Dict[str, float]]) -> np.ndarray:
+        """The pixels inside decimal coordinates, as a view of the page array.
+
+        Pixel bounds are truncated the same way as ImageExtractor.crop_image.
+        """
+        x_min = int(coordinates["top_left"]["x"] * self.width)
+        y_min = int(coordinates["top_left"]["y"] * self.height)
+        x_max = int(coordinates["bottom_right"]["x"] * self.width)
+        y_max = int(coordinates["bottom_right"]["y"] * self.height)
+        return self.pixels[max(y_min, 0) : y_max, max(x_min, 0) : x_max]
+
+    def crop_image(self, coordinates: Dict[str, Dict[str, float]]) -> Image.Image:
+        """A PIL image of a crop, for OCR engines. Only the crop is copied."""
+        return Image.fromarray(np.ascontiguousarray(self.crop(coordinates)))
+
+    def to_image(self) -> Image.Image:
+        return Image.fromarray(np.ascontiguousarray(self.pixels))
+
+    @staticmethod
+    def _normalise_slice_bounds(
+        start: np.ndarray, stop: np.ndarray, length: int
+    ) -> np.ndarray:
+        """Apply Python's slice clamping rules (step 1) to arrays of bounds."""
+        bounds = np.stack([start, stop])
+        bounds = np.where(bounds < 0, bounds + length, bounds)
+        bounds = np.clip(bounds, 0, length)
+        return np.stack([bounds[0], np.maximum(bounds[0], bounds[1])])
+
+    def average_pixel_values(
+        self, coordinates_list: List[Dict[str, Dict[str, float]]]
+    ) -> List[List[int]]:
+        """Calculate the average RGB value under each set of decimal coordinates.
+
+        Produces the same values as ImageExtractor.calculate_average_pixel_value,
+        but horizontal and vertical lines are summed from row and column prefix
+        sums, so the page is only decoded and scanned once. On a grayscale page
+        each average is the luminance repeated as an RGB triple.
+        """
+        if not coordinates_list:
+            return []
+
+        decimal = np.array(
+            [
+                [
+                    coordinates["top_left"]["x"],
+                    coordinates["top_left"]["y"],
+                    coordinates["bottom_right"]["x"],
+                    coordinates["bottom_right"]["y"],
+                ]
+                for coordinates in coordinates_list
+            ],
+            dtype=np.float64,
+        )
+        scale = np.array([self.width, self.height, self.width, self.height])
+        x_min, y_min, x_max, y_max = np.trunc(decimal * scale).astype(np.int64).T
+
+        vertical = x_min == x_max
+        horizontal = ~vertical & (y_min == y_max)
+        box = ~vertical & ~horizontal
+
+        # Slice bounds in the same form the per-line implementation indexes with
+        row_start = y_min.copy()
+        row_stop = np.where(horizontal, y_min + 1, y_max)
+        col_start = x_min.copy()
+        col_stop = np.where(vertical, x_min + 1, x_max)
+
+        row_start, row_stop = self._normalise_slice_bounds(
+            row_start, row_stop, self.height
+        )
+        col_start, col_stop = self._normalise_slice_bounds(
+            col_start, col_stop, self.width
+        )
+
+        sums = np.zeros((len(coordinates_list), self._channels), dtype=np.int64)
+
+        if horizontal.any():
+            sums[horizontal] = self._sum_rows(
+                row_start[horizontal],
+                row_stop[horizontal],
+                col_start[horizontal],
+                col_stop[horizontal],
+            )
+        if vertical.any():
+            sums[vertical] = self._sum_columns(
+                col_start[vertical],
+                col_stop[vertical],
+                row_start[vertical],
+                row_stop[vertical],
+            )
+        for index in np.flatnonzero(box):
+            region = self._channel_pixels[
+                row_start[index] : row_stop[index], col_start[index] : col_stop[index]
+            ]
+            sums[index] = region.sum(axis=(0, 1), dtype=np.int64)
+
+        counts = (row_stop - row_start) * (col_stop - col_start)
+        averages = np.zeros((len(coordinates_list), self._channels), dtype=np.int64)
+        non_empty = counts > 0
+        averages[non_empty] = np.round(
+            sums[non_empty] / counts[non_empty, None]
+        ).astype(np.int64)
+        if self._channels == 1:
+            averages = np.repeat(averages, 3, axis=1)
+        return averages.tolist()
+
+    def _sum_rows(
+        self,
+        row_start: np.ndarray,
+        row_stop: np.ndarray,
+        col_start: np.ndarray,
+        col_stop: np.ndarray,
+    ) -> np.ndarray:
+        """Sum single-row strips using prefix sums over the rows they touch."""
+        sums = np.zeros((len(row_start), self._channels), dtype=np.int64)
+        has_row = row_stop > row_start
+        if not has_row.any():
+            return sums
+        rows, row_lookup = np.unique(row_start[has_row], return_inverse=True)
+        prefix = np.zeros((len(rows), self.width + 1, self._channels), dtype=np.int64)
+        np.cumsum(self._channel_pixels[rows], axis=1, dtype=np.int64, out=prefix[:, 1:])
+        sums[has_row] = (
+            prefix[row_lookup, col_stop[has_row]]
+            - prefix[row_lookup, col_start[has_row]]
+        )
+        return sums
+
+    def _sum_columns(
+        self,
+        col_start: np.ndarray,
+        col_stop: np.ndarray,
+        row_start: np.ndarray,
+        row_stop: np.ndarray,
+    ) -> np.ndarray:
+        """Sum single-column strips using prefix sums over the columns they touch."""
+        sums = np.zeros((len(col_start), self._channels), dtype=np.int64)
+        has_column = col_stop > col_start
+        if not has_column.any():
+            return sums
+        columns, column_lookup = np.unique(col_start[has_column], return_inverse=True)
+        prefix = np.zeros(
+            (len(columns), self.height + 1, self._channels), dtype=np.int64
+        )
+        np.cumsum(
+            self._channel_pixels[:, columns].transpose(1, 0, 2),
+            axis=1,
+            dtype=np.int64,
+            out=prefix[:, 1:],
+        )
+        sums[has_column] = (
+            prefix[column_lookup, row_stop[has_column]]
+            - prefix[column_lookup, row_start[has_column]]
+        )
+        return sums
+
+
+class RegionRaster(PageRaster):
+    """The pixels of one region of a page, at the scale of the whole page.
+
+    width and height are those of the whole page render, and left and top
+    place the region's pixels on it, so crops take page decimal coordinates
+    and give the same pixels as cropping the whole page would.
+    """
+
+    def __init__(
+        self, pixels: np.ndarray, width: int, height: int, left: int, top: int
+    ) -> None:
+        super().__init__(pixels)
+        self.width = width
+        self.height = height
+        self.left = left
+        self.top = top
+
+    def crop(self, coordinates: Dict[str, Dict[str, float]]) -> np.ndarray:
+        x_min = int(coordinates["top_left"]["x"] * self.width) - self.left
+        y_min = int(coordinates["top_left"]["y"] * self.height) - self.top
+        x_max = int(coordinates["bottom_right"]["x"] * self.width) - self.left
+        y_max = int(coordinates["bottom_right"]["y"] * self.height) - self.top
+        return self.pixels[max(y_min, 0) : max(y_max, 0), max(x_min, 0) : max(x_max, 0)]
+
+
+class RegionRasterSet:
+    """Several rendered regions of one page, cropped like the whole page.
+
+    Each crop is taken from the region it overlaps most, so a crop should lie
+    inside one region. It is not a PageRaster: only crops are supported, as
+    the rest of the page was never rendered.
+    """
+
+    def __init__(self, regions: List[RegionRaster]) -> None:
+        self.regions = regions
+        self.width = regions[0].width
+        self.height = regions[0].height
+
+    @property
+    def grayscale(self) -> bool:
+        return self.regions[0].grayscale
+
+    def crop(self, coordinates: Dict[str, Dict[str, float]]) -> np.ndarray:
+        x_min = int(coordinates["top_left"]["x"] * self.width)
+        y_min = int(coordinates["top_left"]["y"] * self.height)
+        x_max = int(coordinates["bottom_right"]["x"] * self.width)
+        y_max = int(coordinates["bottom_right"]["y"] * self.height)
+
+        def overlap(region: RegionRaster) -> Tuple[int, int]:
+            width = min(x_max, region.left + region.pixels.shape[1]) - max(
+                x_min, region.left
+            )
+            height = min(y_max, region.top + region.pixels.shape[0]) - max(
+                y_min, region.top
+            )
+            return max(width, 0) * max(height, 0), min(width, height)
+
+        return max(self.regions, key=overlap).crop(coordinates)
+
+    def crop_image(self, coordinates: Dict[str, Dict[str, float]]) -> Image.Image:
+        """A PIL image of a crop, for OCR engines. Only the crop is copied."""
+        return Image.fromarray(np.ascontiguousarray(self.crop(coordinates)))
+
+
+def import_pymupdf() -> Any:
+    """Import PyMuPDF, or return None when it is not installed."""
+    try:
+        import pymupdf
+
+        return pymupdf
+    except ImportError:  # pragma: no cover - optional dependency
+        pass
+    try:
+        import fitz  # type: ignore  # PyMuPDF before 1.24
+
+        return fitz
+    except ImportError:  # pragma: no cover - optional dependency
+        return None
+
+
+class RegionRenderer:
+    """Renders regions of a PDF's pages with PyMuPDF clip rectangles.
+
+    Only the pixels inside the region are rasterised, so a page with a few
+    small OCR boxes costs a fraction of a whole page render. Raises
+    ImportError when PyMuPDF is not installed; check is_available first.
+    """
+
+    def __init__(self, pdf_bytes: bytes, profile: RenderProfile) -> None:
+        pymupdf = import_pymupdf()
+        if pymupdf is None:
+            raise ImportError("Region rendering requires PyMuPDF")
+        self.pymupdf = pymupdf
+        self.profile = profile
+        self.document = pymupdf.open(stream=pdf_bytes, filetype="pdf")
+
+    @staticmethod
+    def is_available() -> bool:
+        return import_pymupdf() is not None
+
+    def render(
+        self, page_index: int, coordinates: Dict[str, Dict[str, float]]
+    ) -> RegionRaster:
+        """Render the decimal coordinates of a page, widened to whole pixels."""
+        page = self.document[page_index]
+        scale = self.profile.dpi / 72
+        matrix = self.pymupdf.Matrix(scale, scale)
+        page_pixels = (page.rect * matrix).irect
+        width, height = page_pixels.width, page_pixels.height
+        left = max(math.floor(coordinates["top_left"]["x"] * width), 0)
+        top = max(math.floor(coordinates["top_left"]["y"] * height), 0)
+        right = min(math.ceil(coordinates["bottom_right"]["x"] * width), width)
+        bottom = min(math.ceil(coordinates["bottom_right"]["y"] * height), height)
+        clip = self.pymupdf.Rect(
+            page.rect.x0 + left / scale,
+            page.rect.y0 + top / scale,
+            page.rect.x0 + right / scale,
+            page.rect.y0 + bottom / scale,
+        )
+        pixmap = page.get_pixmap(
+            matrix=matrix,
+            clip=clip,
+            colorspace=(
+                self.pymupdf.csGRAY if self.profile.grayscale else self.pymupdf.csRGB
+            ),
+            alpha=False,
+        )
+        pixels = np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(
+            pixmap.height, pixmap.width, pixmap.n
+        )
+        if self.profile.grayscale:
+            pixels = pixels[:, :, 0]
+        return RegionRaster(
+            pixels,
+            width,
+            height,
+            pixmap.x - page_pixels.x0,
+            pixmap.y - page_pixels.y0,
+        )
+
+    def render_regions(
+        self, page_index: int, regions: List[Dict[str, Dict[str, float]]]
+    ) -> RegionRasterSet:
+        """Render each of a page's regions with its own clip rectangle."""
+        return RegionRasterSet(
+            [self.render(page_index, coordinates) for coordinates in regions]
+        )
+
+    def close(self) -> None:
+        self.document.close()
+
+
+class RasterStore:
+    """Page images of a PDF, rendered straight to decoded uint8 arrays.
+
+    Pages are rendered on first use, without encoding them to JPEG, and kept
+    as PageRasters. At most max_resident pages are held in memory. The least
+    recently used page beyond that is written to a memory-mapped file under
+    spill_directory, when one is given, or dropped to be rendered again
+    otherwise. Spilled pages are read back as memory-mapped arrays, so crops
+    of them only load the rows they cover.
+    """
+
+    def __init__(
+        self,
+        pdf_bytes: bytes,
+        dpi: int = 200,
+        grayscale: bool = False,
+        max_resident: int = 8,
+        spill_directory: Optional[str] = None,
+        thread_count: int = 1,
+    ) -> None:
+        self.pdf_bytes = pdf_bytes
+        self.profile = RenderProfile(dpi, grayscale, thread_count)
+        self.max_resident = max_resident
+        self.spill_directory = spill_directory
+        self._resident: "OrderedDict[int, PageRaster]" = OrderedDict()
+        self._spilled: Dict[int, str] = {}
+        self._spill_path: Optional[str] = None
+
+    def __enter__(self) -> "RasterStore":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def render(self, page_index: int) -> np.ndarray:
+        image = self.profile.render(
+            self.pdf_bytes, first_page=page_index + 1, last_page=page_index + 1
+        )[0]
+        return np.asarray(image.convert("L" if self.profile.grayscale else "RGB"))
+
+    def get(self, page_index: int) -> PageRaster:
+        """Get a page's raster, rendering it or mapping it back in if needed."""
+        raster = self._resident.get(page_index)
+        if raster is not None:
+            self._resident.move_to_end(page_index)
+            return raster
+
+        if page_index in self._spilled:
+            return PageRaster(np.load(self._spilled[page_index], mmap_mode="r"))
+
+        raster = PageRaster(self.render(page_index))
+        self._resident[page_index] = raster
+        while len(self._resident) > self.max_resident:
+            self._evict(*self._resident.popitem(last=False))
+        return raster
+
+    def _evict(self, page_index: int, raster: PageRaster) -> None:
+        if self.spill_directory is None:
+            return
+        if self._spill_path is None:
+            self._spill_path = tempfile.mkdtemp(
+                prefix="pdf-parser-rasters-", dir=self.spill_directory
+            )
+        path = os.path.join(self._spill_path, f"page-{page_index}.npy")
+        np.save(path, raster.pixels)
+        self._spilled[page_index] = path
+
+    def release(self, page_index: int) -> None:
+        """Forget a page, in memory and on disk."""
+        self._resident.pop(page_index, None)
+        path = self._spilled.pop(page_index, None)
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+
+    @property
+    def resident_page_indexes(self) -> List[int]:
+        return list(self._resident)
+
+    @property
+    def spilled_page_indexes(self) -> List[int]:
+        return sorted(self._spilled)
+
+    def close(self) -> None:
+        self._resident.clear()
+        self._spilled.clear()
+        if self._spill_path is not None:
+            shutil.rmtree(self._spill_path, ignore_errors=True)
+            self._spill_path = None
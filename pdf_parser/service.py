@@ -0,0 +1,239 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response
+from pdf2image.exceptions import PDFPageCountError, PDFSyntaxError
+from pdfminer.psexceptions import PSException
+from pdfplumber.utils.exceptions import PdfminerException
+from starlette.datastructures import UploadFile
+
+from pdf_parser.ocr import CachedOcrEngine, get_local_ocr_engine
+from pdf_parser.parser import ParserSession
+from pdf_parser.template import CompiledTemplate, load_templates
+
+# Errors raised by pdfminer, pdfplumber and poppler for a file that is not a
+# readable PDF. Anything else is a server error.
+INPUT_ERRORS = (PdfminerException, PSException, PDFPageCountError, PDFSyntaxError)
+
+# Warm state of each service worker process, set up once by _initialise_worker
+_worker_sessions: Dict[str, ParserSession] = {}
+
+
+def _initialise_worker(templates: Dict[str, CompiledTemplate]) -> None:
+    ocr_engine = CachedOcrEngine(get_local_ocr_engine())
+    for template_id, template in templates.items():
+        _worker_sessions[template_id] = ParserSession(template, ocr_engine)
+
+
+def _parse_in_worker(template_id: str, pdf_bytes: bytes) -> str:
+    return _worker_sessions[template_id].parse(pdf_bytes)
+
+
+class ParsingService:
+    """Parses uploaded PDFs in a pool of worker processes.
+
+    Extraction, OCR and table parsing all run in the workers, so the event
+    loop only receives uploads and returns results. At most max_queue_depth
+    documents are accepted at a time, counting those being uploaded and
+    parsed, and further requests are turned away until there is room.
+    Uploads larger than max_upload_bytes are refused.
+    """
+
+    def __init__(
+        self,
+        templates: Dict[str, CompiledTemplate],
+        workers: Optional[int] = None,
+        max_queue_depth: Optional[int] = None,
+        max_upload_bytes: int = 50 * 1024 * 1024,
+    ) -> None:
+        self.templates = templates
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue_depth = max_queue_depth or self.workers * 4
+        self.max_upload_bytes = max_upload_bytes
+        self.in_flight = 0
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        """Start the worker pool on first use. Workers are spawned rather than
+        forked, as the server process is already running threads."""
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_initialise_worker,
+                initargs=(self.templates,),
+            )
+        return self.executor
+
+    def is_full(self) -> bool:
+        return self.in_flight >= self.max_queue_depth
+
+    def reserve(self) -> bool:
+        """Take a slot for a document, or return False when none is free.
+        Call release once the document is done."""
+        if self.is_full():
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self) -> None:
+        self.in_flight -= 1
+
+    async def parse(self, template_id: str, pdf_bytes: bytes) -> str:
+        executor = self.get_executor()
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                executor, _parse_in_worker, template_id, pdf_bytes
+            )
+        except BrokenProcessPool:
+            # A worker died, so start a new pool for the next request, unless
+            # a request that failed earlier has already replaced it
+            if self.executor is executor:
+                self.close()
+            raise
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+def create_app(
+    templates: Union[str, Dict[str, Any]],
+    workers: Optional[int] = None,
+    max_queue_depth: Optional[int] = None,
+    max_upload_bytes: int = 50 * 1024 * 1024,
+) -> FastAPI:
+    """Create the parsing service app.
+
+    templates is a directory of template JSON files, keyed by file name without
+    the extension, or a dict of template id to template. Templates are
+    validated and compiled here, before the app accepts requests.
+    """
+    if isinstance(templates, str):
+        compiled_templates = load_templates(templates)
+    else:
+        compiled_templates = {
+            template_id: CompiledTemplate.compile(template)
+            for template_id, template in templates.items()
+        }
+    service = ParsingService(
+        compiled_templates, workers, max_queue_depth, max_upload_bytes
+    )
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        yield
+        service.close()
+
+    app = FastAPI(title="PDF Parser", lifespan=lifespan)
+    app.state.service = service
+
+    @app.get("/health")
+    async def health() -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "in_flight": service.in_flight,
+            "max_queue_depth": service.max_queue_depth,
+        }
+
+    @app.get("/templates")
+    async def list_templates() -> List[Dict[str, Any]]:
+        return [
+            {"template_id": template_id, **template["metadata"]}
+            for template_id, template in service.templates.items()
+        ]
+
+    async def read_upload(request: Request) -> Tuple[str, bytes]:
+        """Read the "template_id" field and the "file" upload of a multipart
+        body, refusing bodies larger than max_upload_bytes."""
+        content_length = request.headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > service.max_upload_bytes:
+            raise HTTPException(status_code=413, detail="The upload is too large")
+        async with request.form(max_files=1) as form:
+            template_id = form.get("template_id")
+            upload = form.get("file")
+            if not isinstance(template_id, str) or not isinstance(upload, UploadFile):
+                raise HTTPException(
+                    status_code=422,
+                    detail='Expected a "file" upload and a "template_id" field',
+                )
+            if template_id not in service.templates:
+                raise HTTPException(
+                    status_code=404, detail=f"Template '{template_id}' not found"
+                )
+            pdf_bytes = await upload.read(service.max_upload_bytes + 1)
+        if len(pdf_bytes) > service.max_upload_bytes:
+            raise HTTPException(status_code=413, detail="The upload is too large")
+        return template_id, pdf_bytes
+
+    # The body is read by the handler rather than by FastAPI's form
+    # parameters, so a full queue or an oversized Content-Length is refused
+    # before any of the upload is read
+    @app.post("/parse")
+    async def parse(request: Request) -> Response:
+        if not service.reserve():
+            raise HTTPException(
+                status_code=429,
+                detail="Too many documents are being parsed, try again later",
+                headers={"Retry-After": "1"},
+            )
+        try:
+            template_id, pdf_bytes = await read_upload(request)
+            output = await service.parse(template_id, pdf_bytes)
+        except HTTPException:
+            raise
+        except BrokenProcessPool as e:
+            raise HTTPException(
+                status_code=503, detail="A parsing worker stopped, try again"
+            ) from e
+        except INPUT_ERRORS as e:
+            raise HTTPException(
+                status_code=422, detail=f"{type(e).__name__}: {e}"
+            ) from e
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"{type(e).__name__}: {e}"
+            ) from e
+        finally:
+            service.release()
+        return Response(content=output, media_type="application/json")
+
+    return app
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import uvicorn
+
+    argument_parser = argparse.ArgumentParser(description="Run the parsing service.")
+    argument_parser.add_argument(
+        "--templates", required=True, help="Directory of template JSON files"
+    )
+    argument_parser.add_argument("--host", default="127.0.0.1")
+    argument_parser.add_argument("--port", type=int, default=8000)
+    argument_parser.add_argument("--workers", type=int)
+    argument_parser.add_argument("--max-queue-depth", type=int)
+    argument_parser.add_argument(
+        "--max-upload-mb", type=int, default=50, help="Largest PDF accepted, in MB"
+    )
+    arguments = argument_parser.parse_args(argv)
+
+    app = create_app(
+        arguments.templates,
+        workers=arguments.workers,
+        max_queue_depth=arguments.max_queue_depth,
+        max_upload_bytes=arguments.max_upload_mb * 1024 * 1024,
+    )
+    uvicorn.run(app, host=arguments.host, port=arguments.port)
+
+
+if __name__ == "__main__":
+    main()
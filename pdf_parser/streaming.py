@@ -0,0 +1,83 @@
+import json
+import os
+import uuid
+from typing import Any, Dict, IO, Iterable, Optional, Union
+
+from pdf_parser.document import LazyDocument
+from pdf_parser.parser import ParserSession
+
+
+class JsonLinesWriter:
+    """Writes one JSON object per line, flushing after each line so results can
+    be read while a document is still being parsed.
+
+    Accepts an open text file or a path, which is opened for appending. A
+    last line cut short by a crash is removed first, so the next line starts
+    on a line of its own.
+    """
+
+    def __init__(self, file: Union[str, IO[str]]) -> None:
+        if isinstance(file, str):
+            self.truncate_partial_line(file)
+            self.file = open(file, "a", encoding="utf-8")
+            self.owns_file = True
+        else:
+            self.file = file
+            self.owns_file = False
+
+    @staticmethod
+    def truncate_partial_line(path: str, chunk_size: int = 65536) -> None:
+        """Cut a file back to the end of its last complete line."""
+        if not os.path.exists(path):
+            return
+        with open(path, "r+b") as existing_file:
+            end = existing_file.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                start = max(position - chunk_size, 0)
+                existing_file.seek(start)
+                newline = existing_file.read(position - start).rfind(b"\n")
+                if newline != -1:
+                    position = start + newline + 1
+                    break
+                position = start
+            if position < end:
+                existing_file.truncate(position)
+
+    def __enter__(self) -> "JsonLinesWriter":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+    def write_pages(self, pages: Iterable[Dict[str, Any]], **fields: Any) -> int:
+        """Write each page result with the given fields added, returning the
+        number of pages written."""
+        number_of_pages = 0
+        for page in pages:
+            self.write({**fields, **page})
+            number_of_pages += 1
+        return number_of_pages
+
+    def close(self) -> None:
+        if self.owns_file:
+            self.file.close()
+
+
+def stream_pdf_to_json_lines(
+    session: ParserSession,
+    document: Union[bytes, LazyDocument],
+    writer: JsonLinesWriter,
+    document_id: Optional[str] = None,
+) -> int:
+    """Parse a document page by page, writing one line per page as it is parsed.
+
+    Every line carries the document_id, so lines from several documents can
+    share a file. Returns the number of pages written.
+    """
+    document_id = document_id or str(uuid.uuid4())
+    return writer.write_pages(session.iter_pages(document), document_id=document_id)
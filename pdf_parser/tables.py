@@ -1,16 +1,30 @@
-from typing import Dict, List, Any, Optional
-from pdf_parser.coordinate_utils import CoordinateUtils
+from typing import Dict, Iterator, List, Any, Optional, Union
+
+import numpy as np
+
+from pdf_parser.coordinate_utils import CoordinateUtils, SpatialIndex
+from pdf_parser.page_model import ColumnarLines
+from pdf_parser.template import CompiledTemplate
 
 
 class TableProcessor:
-    def __init__(self, template: Dict[str, Any]) -> None:
+    def __init__(
+        self,
+        template: Dict[str, Any],
+        coordinate_utils: Optional[CoordinateUtils] = None,
+    ) -> None:
         self.template = template
-        self.coordinate_utils = CoordinateUtils()
+        self.coordinate_utils = coordinate_utils or CoordinateUtils()
 
     def get_delimiter_column_coordinates(
         self, template: Dict[str, Any], delimiter_field_name: str, rule_id: str
     ) -> Optional[Dict[str, Dict[str, float]]]:
         """Get the coordinates of the description column from the template."""
+        if isinstance(template, CompiledTemplate):
+            return template.get_delimiter_column_coordinates(
+                rule_id, delimiter_field_name
+            )
+
         delimiter_coordinates = None
         rule = self.coordinate_utils.get_rule_from_id(rule_id, template)
 
@@ -34,7 +48,7 @@ class TableProcessor:
             self.template, delimiter_field_name, table_rule["rule_id"]
         )
 
-        table_splitter = TableSplitter(self.template)
+        table_splitter = TableSplitter(self.template, self.coordinate_utils)
 
         if delimiter_type == "line":
             max_pixel_value = table_rule["config"]["row_delimiter"].get(
@@ -50,6 +64,7 @@ class TableProcessor:
                 page_content,
                 delimiter_field_name=delimiter_field_name,
                 rule_id=table_rule["rule_id"],
+                tolerance=table_rule["config"]["row_delimiter"].get("tolerance", 0.01),
             )
 
         if not delimiter_coordinates:
@@ -69,9 +84,13 @@ class TableProcessor:
 
 
 class TableSplitter:
-    def __init__(self, template: Dict[str, Any]) -> None:
+    def __init__(
+        self,
+        template: Dict[str, Any],
+        coordinate_utils: Optional[CoordinateUtils] = None,
+    ) -> None:
         self.template = template
-        self.coordinate_utils = CoordinateUtils()
+        self.coordinate_utils = coordinate_utils or CoordinateUtils()
 
     def split_bounding_box_by_lines(
         self,
@@ -134,11 +153,15 @@ class TableSplitter:
         return filtered_lines
 
     def split_table_by_field(
-        self, page_content: Dict[str, Any], delimiter_field_name: str, rule_id: str
+        self,
+        page_content: Dict[str, Any],
+        delimiter_field_name: str,
+        rule_id: str,
+        tolerance: float = 0.01,
     ) -> List[float]:
         text_coordinates = page_content["content"]
 
-        table_processor = TableProcessor(self.template)
+        table_processor = TableProcessor(self.template, self.coordinate_utils)
 
         delimiter_coordinates = table_processor.get_delimiter_column_coordinates(
             self.template, delimiter_field_name, rule_id
@@ -147,46 +170,47 @@ class TableSplitter:
         if delimiter_coordinates is None:
             raise ValueError("Delimiter coordinates not found")
 
-        items_within_coordinates = self.coordinate_utils.get_items_in_bounding_box(
-            text_coordinates, delimiter_coordinates
-        )
+        spatial_index = self.coordinate_utils.get_spatial_index(text_coordinates)
+        indexes_within_coordinates = spatial_index.query(delimiter_coordinates)
 
         line_separation_y_coordinates = sorted(
-            list(
-                set(
-                    item["bounding_box"]["decimal_coordinates"]["top_left"]["y"]
-                    for item in items_within_coordinates
-                )
-            )
+            list(set(spatial_index.y0[indexes_within_coordinates].tolist()))
         )
 
         line_separation_y_coordinates = self.average_y_coordinates(
-            line_separation_y_coordinates
+            line_separation_y_coordinates, tolerance
         )
 
         return line_separation_y_coordinates
 
-    def average_y_coordinates(self, y_coordinates: List[float]) -> List[float]:
-        threshold = 0.01
-        averaged_y_coordinates = []
-        while y_coordinates:
-            current_value = y_coordinates.pop(0)
-            close_values = [current_value]
-
-            # Check for values within 0.01
-            for value in y_coordinates:
-                if abs(value - current_value) < threshold:
-                    close_values.append(value)
-                    y_coordinates.remove(value)
-
-            # Calculate the average and add to the result
-            averaged_y_coordinates.append(sum(close_values) / len(close_values))
-
-        return averaged_y_coordinates
+    def average_y_coordinates(
+        self, y_coordinates: List[float], tolerance: float = 0.01
+    ) -> List[float]:
+        """Merge y coordinates that are close together into their averages.
+
+        The values are sorted and split wherever the gap between neighbours is
+        at least the tolerance, so a chain of values each closer than the
+        tolerance to the next forms one group, however far apart its ends are.
+        Returns the mean of each group in ascending order. The input list is
+        not modified.
+        """
+        values = np.sort(np.asarray(y_coordinates, dtype=np.float64))
+        if len(values) == 0:
+            return []
+        group_starts = np.concatenate(
+            ([0], np.flatnonzero(np.diff(values) >= tolerance) + 1)
+        )
+        sums = np.add.reduceat(values, group_starts)
+        counts = np.diff(np.append(group_starts, len(values)))
+        return (sums / counts).tolist()
 
     def split_table_by_line(
-        self, lines: List[Dict[str, Any]], max_pixel_value: Optional[int] = None
+        self,
+        lines: Union[List[Dict[str, Any]], ColumnarLines],
+        max_pixel_value: Optional[int] = None,
     ) -> List[float]:
+        if isinstance(lines, ColumnarLines):
+            return sorted(list(set(lines.get_top_y_coordinates(max_pixel_value))))
         filtered_lines = self.filter_lines_by_pixel_value(lines, max_pixel_value)
         lines_y_coordinates = [
             line["decimal_coordinates"]["top_left"]["y"] for line in filtered_lines
@@ -200,6 +224,7 @@ class TableSplitter:
         delimiter_field_name: Optional[str] = None,
         rule_id: Optional[str] = None,
         max_pixel_value: Optional[int] = None,
+        tolerance: float = 0.01,
     ) -> List[float]:
         if row_delimiter_type == "line":
             return self.split_table_by_line(
@@ -211,6 +236,142 @@ class TableSplitter:
                     "delimiter_field_name and rule_id are required for field delimiter type"
                 )
             return self.split_table_by_field(
-                page_content, delimiter_field_name, rule_id
+                page_content, delimiter_field_name, rule_id, tolerance
             )
         return []
+
+
+class TableEngine:
+    """Assigns a table's words to its cells with array operations.
+
+    The words inside the table are found with one index query. Each word's
+    range of rows in a column then comes from binary searches against the
+    column's row edges, using the same containment test and threshold as
+    querying every cell box on its own.
+    """
+
+    def __init__(self, threshold: float = 0.005) -> None:
+        self.threshold = threshold
+
+    def get_cell_indexes(
+        self,
+        spatial_index: SpatialIndex,
+        column_boxes: List[List[Dict[str, Dict[str, float]]]],
+    ) -> List[List[np.ndarray]]:
+        """Get the word indexes, in original order, in each row of each column.
+
+        column_boxes holds the split row boxes of each column, as returned by
+        TableSplitter.split_bounding_box_by_lines.
+        """
+        threshold = self.threshold
+        split_columns = [boxes for boxes in column_boxes if boxes]
+        if not split_columns:
+            return [[] for _ in column_boxes]
+
+        table_box = {
+            "top_left": {
+                "x": min(boxes[0]["top_left"]["x"] for boxes in split_columns),
+                "y": min(boxes[0]["top_left"]["y"] for boxes in split_columns),
+            },
+            "bottom_right": {
+                "x": max(boxes[0]["bottom_right"]["x"] for boxes in split_columns),
+                "y": max(boxes[-1]["bottom_right"]["y"] for boxes in split_columns),
+            },
+        }
+        candidates = spatial_index.query(table_box, threshold)
+        x0 = spatial_index.x0[candidates]
+        y0 = spatial_index.y0[candidates]
+        x1 = spatial_index.x1[candidates]
+        y1 = spatial_index.y1[candidates]
+
+        cell_indexes = []
+        for boxes in column_boxes:
+            if not boxes:
+                cell_indexes.append([])
+                continue
+            left = boxes[0]["top_left"]["x"] - threshold
+            right = boxes[0]["bottom_right"]["x"] + threshold
+            row_tops = np.array([box["top_left"]["y"] for box in boxes]) - threshold
+            row_bottoms = (
+                np.array([box["bottom_right"]["y"] for box in boxes]) + threshold
+            )
+
+            # A word is in every row whose top is above it and whose bottom is
+            # below it, and words within the threshold of a line are in both rows
+            in_column = (x0 >= left) & (x1 <= right)
+            words = candidates[in_column]
+            first_rows = np.searchsorted(row_bottoms, y1[in_column], side="left")
+            last_rows = np.searchsorted(row_tops, y0[in_column], side="right") - 1
+            counts = np.maximum(last_rows - first_rows + 1, 0)
+            offsets = np.arange(counts.sum()) - np.repeat(
+                np.cumsum(counts) - counts, counts
+            )
+            cell_words = np.repeat(words, counts)
+            cell_rows = np.repeat(first_rows, counts) + offsets
+
+            order = np.lexsort((cell_words, cell_rows))
+            cell_words = cell_words[order]
+            bounds = np.searchsorted(cell_rows[order], np.arange(len(boxes) + 1))
+            cell_indexes.append(
+                [cell_words[bounds[row] : bounds[row + 1]] for row in range(len(boxes))]
+            )
+        return cell_indexes
+
+
+class TableContinuation:
+    """Joins the rows a table rule finds on consecutive pages into one table.
+
+    Rows are released as soon as they are complete. The last row of a page is
+    held back, because a row cut by the page break continues at the top of the
+    next page as a row whose merge field is empty. That fragment is joined onto
+    the held row instead of starting a new one. On every page after the first,
+    leading rows that repeat the first page's header rows are dropped.
+    """
+
+    def __init__(self, delimiter_field_name: str, config: Dict[str, Any]) -> None:
+        self.number_of_header_rows = config.get("header_rows", 0)
+        self.merge_field = config.get("merge_field", delimiter_field_name)
+        self.header_rows: List[Dict[str, str]] = []
+        self.pending_row: Optional[Dict[str, str]] = None
+        self.number_of_pages = 0
+
+    def add_page(self, rows: List[Dict[str, str]]) -> Iterator[Dict[str, str]]:
+        """Add a page's rows, yielding the rows that are now complete."""
+        rows = list(rows)
+        if self.number_of_pages > 0:
+            while rows and rows[0] in self.header_rows:
+                rows.pop(0)
+
+        if rows and not rows[0].get(self.merge_field):
+            fragment = rows.pop(0)
+            if self.pending_row is not None:
+                self.pending_row = self.merge_rows(self.pending_row, fragment)
+            elif any(fragment.values()):
+                rows.insert(0, fragment)
+
+        if self.number_of_pages == 0:
+            self.header_rows = rows[: self.number_of_header_rows]
+        self.number_of_pages += 1
+
+        if rows:
+            if self.pending_row is not None:
+                yield self.pending_row
+            yield from rows[:-1]
+            self.pending_row = rows[-1]
+
+    def finish(self) -> Iterator[Dict[str, str]]:
+        """Yield the row held back from the last page."""
+        if self.pending_row is not None:
+            yield self.pending_row
+            self.pending_row = None
+
+    @staticmethod
+    def merge_rows(row: Dict[str, str], fragment: Dict[str, str]) -> Dict[str, str]:
+        merged = dict(row)
+        for field_name, text in fragment.items():
+            if not text:
+                continue
+            merged[field_name] = (
+                f"{merged[field_name]} {text}" if merged.get(field_name) else text
+            )
+        return merged
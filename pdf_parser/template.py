@@ -0,0 +1,150 @@
+import json
+import os
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Optional, Union
+
+from jsonschema import Draft7Validator
+
+from pdf_parser.raster import RenderProfile
+
+
+class TemplateRequirements:
+    """What a template needs from a document beyond its extracted words.
+
+    Rendering pages is the most expensive part of extraction, so it is only
+    done when a template OCRs text or splits a table on line colours. Rules
+    that no page refers to are ignored. Pages are rendered for line sampling
+    and for OCR with the template's render_profiles, which default to 200 DPI
+    RGB.
+    """
+
+    def __init__(self, template: Mapping) -> None:
+        used_rule_ids = {
+            rule_id
+            for page_rule in template.get("pages", [])
+            for rule_id in page_rule.get("forms", []) + page_rule.get("tables", [])
+        }
+        self.line_colour_mode = template.get("line_colour_mode", "raster")
+        self.samples_line_colours = any(
+            rule["rule_id"] in used_rule_ids
+            and rule["type"] == "table"
+            and rule["config"].get("row_delimiter", {}).get("type") == "line"
+            for rule in template.get("rules", [])
+        )
+        render_profiles = template.get("render_profiles", {})
+        self.line_sampling_profile = RenderProfile.from_config(
+            render_profiles.get("line_sampling")
+        )
+        self.ocr_profile = RenderProfile.from_config(render_profiles.get("ocr"))
+
+    @property
+    def renders_line_colours(self) -> bool:
+        return self.samples_line_colours and self.line_colour_mode == "raster"
+
+
+@lru_cache(maxsize=None)
+def get_template_validator() -> Draft7Validator:
+    """Load the template JSON schema and build its validator once per process."""
+    schema_path = os.path.join(
+        os.path.dirname(__file__),
+        "schema",
+        "template_json_schema.json",
+    )
+
+    if not os.path.exists(schema_path):
+        raise FileNotFoundError(f"Schema file not found: {schema_path}")
+
+    with open(schema_path) as schema_file:
+        template_json_schema = json.load(schema_file)
+
+    Draft7Validator.check_schema(template_json_schema)
+    return Draft7Validator(template_json_schema)
+
+
+class CompiledTemplate(Mapping):
+    """A template that has been validated and indexed once, ready for reuse.
+
+    It reads like the template dict it wraps, but rule, column and delimiter
+    lookups are dictionary lookups instead of scans of the rule list.
+    """
+
+    def __init__(self, template: Dict[str, Any]) -> None:
+        get_template_validator().validate(template)
+        self.template = template
+        self.requirements = TemplateRequirements(template)
+
+        self.rules_by_id: Dict[str, Dict[str, Any]] = {}
+        for rule in template["rules"]:
+            # Keep the first rule for a duplicated id, as a scan of the list would
+            self.rules_by_id.setdefault(rule["rule_id"], rule)
+
+        self.columns_by_name: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.delimiter_coordinates: Dict[str, Optional[Dict[str, Any]]] = {}
+        for rule_id, rule in self.rules_by_id.items():
+            if rule["type"] != "table":
+                continue
+            columns: Dict[str, Dict[str, Any]] = {}
+            for column in rule["config"]["columns"]:
+                columns.setdefault(column["field_name"], column)
+            self.columns_by_name[rule_id] = columns
+            delimiter_field_name = rule["config"]["row_delimiter"]["field_name"]
+            delimiter_column = columns.get(delimiter_field_name)
+            self.delimiter_coordinates[rule_id] = (
+                delimiter_column["coordinates"] if delimiter_column else None
+            )
+
+    @classmethod
+    def compile(
+        cls, template: Union[Dict[str, Any], "CompiledTemplate"]
+    ) -> "CompiledTemplate":
+        if isinstance(template, CompiledTemplate):
+            return template
+        return cls(template)
+
+    def __getitem__(self, key: str) -> Any:
+        return self.template[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.template)
+
+    def __len__(self) -> int:
+        return len(self.template)
+
+    def get_rule(self, rule_id: str) -> Dict[str, Any]:
+        try:
+            return self.rules_by_id[rule_id]
+        except KeyError:
+            # Callers handle unknown rules as IndexError, as with the list scan
+            raise IndexError(f"Rule ID '{rule_id}' not found") from None
+
+    def get_delimiter_column_coordinates(
+        self, rule_id: str, delimiter_field_name: str
+    ) -> Optional[Dict[str, Any]]:
+        rule = self.get_rule(rule_id)
+        if rule["type"] != "table":
+            return None
+        if delimiter_field_name == rule["config"]["row_delimiter"]["field_name"]:
+            return self.delimiter_coordinates[rule_id]
+        column = self.columns_by_name[rule_id].get(delimiter_field_name)
+        return column["coordinates"] if column else None
+
+
+def get_template_requirements(template: Mapping) -> TemplateRequirements:
+    """Get the requirements of a template, reusing those of a compiled one."""
+    if isinstance(template, CompiledTemplate):
+        return template.requirements
+    return TemplateRequirements(template)
+
+
+def load_templates(directory: str) -> Dict[str, CompiledTemplate]:
+    """Load and compile every JSON template in a directory, keyed by file name
+    without the extension."""
+    templates = {}
+    for file_name in sorted(os.listdir(directory)):
+        template_id, extension = os.path.splitext(file_name)
+        if extension != ".json":
+            continue
+        with open(os.path.join(directory, file_name)) as template_file:
+            templates[template_id] = CompiledTemplate(json.load(template_file))
+    return templates
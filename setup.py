@@ -30,4 +30,14 @@ setup(
         "pydantic",
         "jsonschema",
     ],
+    extras_require={
+        "tesserocr": ["tesserocr"],
+        "service": ["fastapi", "uvicorn", "python-multipart"],
+    },
+    entry_points={
+        "console_scripts": [
+            "pdf-parser-batch=pdf_parser.batch:main",
+            "pdf-parser-service=pdf_parser.service:main",
+        ],
+    },
 )
@@ -0,0 +1,99 @@
+import random
+from typing import Any, Dict, List
+
+import pytest
+
+pymupdf = pytest.importorskip("pymupdf")
+
+WORDS = ["Payment", "to", "shop", "Transfer", "from", "card", "Direct", "Debit"]
+
+
+def make_statement(pages: int = 1, rows: int = 20, seed: int = 0) -> bytes:
+    """A statement with a fixed header, ruled lines and random transactions."""
+    generator = random.Random(seed)
+    document = pymupdf.open()
+    for _ in range(pages):
+        page = document.new_page(width=595, height=842)
+        page.insert_text((40, 50), "ACME BANK Statement of account")
+        page.insert_text((40, 70), f"Account Number {generator.randint(10**7, 10**8)}")
+        for x, heading in [(40, "Date"), (130, "Description"), (440, "Amount")]:
+            page.insert_text((x, 112), heading, fontsize=9)
+        page.draw_line((30, 118), (570, 118), color=(0, 0, 0), width=0.7)
+        for row in range(rows):
+            y = 130 + row * 30
+            description = " ".join(generator.choice(WORDS) for _ in range(3))
+            page.insert_text((40, y), f"{row % 28 + 1:02d}/01", fontsize=8)
+            page.insert_text((130, y), description, fontsize=8)
+            page.insert_text((440, y), f"{generator.random() * 1000:.2f}", fontsize=8)
+    return document.tobytes()
+
+
+def make_box(x0: float, y0: float, x1: float, y1: float) -> Dict[str, Any]:
+    return {"top_left": {"x": x0, "y": y0}, "bottom_right": {"x": x1, "y": y1}}
+
+
+def make_items(generator: random.Random, count: int) -> List[Dict[str, Any]]:
+    """Random word boxes, a few of them with their bottom above their top."""
+    items: List[Dict[str, Any]] = []
+    for _ in range(count):
+        x0, y0 = generator.random(), generator.random()
+        width, height = generator.random() * 0.2, generator.random() * 0.05
+        if generator.random() < 0.05:
+            height = -height
+        items.append(
+            {
+                "text": str(len(items)),
+                "bounding_box": {
+                    "decimal_coordinates": make_box(x0, y0, x0 + width, y0 + height)
+                },
+            }
+        )
+    return items
+
+
+def brute_force_indexes(
+    items: List[Dict[str, Any]], box: Dict[str, Any], threshold: float
+) -> List[int]:
+    """The item by item containment test the index replaces."""
+    return [
+        index
+        for index, item in enumerate(items)
+        if item["bounding_box"]["decimal_coordinates"]["top_left"]["x"]
+        >= box["top_left"]["x"] - threshold
+        and item["bounding_box"]["decimal_coordinates"]["top_left"]["y"]
+        >= box["top_left"]["y"] - threshold
+        and item["bounding_box"]["decimal_coordinates"]["bottom_right"]["x"]
+        <= box["bottom_right"]["x"] + threshold
+        and item["bounding_box"]["decimal_coordinates"]["bottom_right"]["y"]
+        <= box["bottom_right"]["y"] + threshold
+    ]
+
+
+@pytest.fixture
+def statement_template() -> Dict[str, Any]:
+    column_boxes = [("date", 40, 110), ("description", 130, 400), ("amount", 440, 560)]
+    return {
+        "metadata": {"template_name": "statement", "version": "1"},
+        "extraction_method": "extraction",
+        "line_colour_mode": "vector",
+        "rules": [
+            {
+                "rule_id": "transactions",
+                "type": "table",
+                "config": {
+                    "columns": [
+                        {
+                            "field_name": field_name,
+                            "coordinates": {
+                                "top_left": {"x": x0 / 595, "y": 120 / 842},
+                                "bottom_right": {"x": x1 / 595, "y": 800 / 842},
+                            },
+                        }
+                        for field_name, x0, x1 in column_boxes
+                    ],
+                    "row_delimiter": {"type": "field", "field_name": "date"},
+                },
+            }
+        ],
+        "pages": [{"page_numbers": "1:-1", "tables": ["transactions"]}],
+    }
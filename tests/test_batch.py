@@ -0,0 +1,78 @@
+import json
+
+from conftest import make_statement
+
+from pdf_parser.batch import BatchJob, BatchProcessor
+from pdf_parser.template import CompiledTemplate
+
+
+def read_records(path):
+    with open(path, encoding="utf-8") as output_file:
+        return [json.loads(line) for line in output_file]
+
+
+def test_interrupted_batch_resumes_and_retries_failed(tmp_path, statement_template):
+    input_directory = tmp_path / "pdfs"
+    input_directory.mkdir()
+    for seed in range(4):
+        (input_directory / f"statement_{seed}.pdf").write_bytes(
+            make_statement(seed=seed)
+        )
+    (input_directory / "broken.pdf").write_bytes(b"not a pdf")
+    jobs = BatchJob.from_directory(str(input_directory), "statement")
+    output_path = str(tmp_path / "results.jsonl")
+    processor = BatchProcessor(
+        {"statement": CompiledTemplate(statement_template)}, workers=2
+    )
+
+    assert processor.run(jobs, output_path) == {
+        "skipped": 0,
+        "ok": 4,
+        "error": 1,
+        "timeout": 0,
+    }
+
+    # Cut the last line short, as a crash while writing it would
+    with open(output_path, "rb") as output_file:
+        content = output_file.read()
+    last_line_start = content.rstrip(b"\n").rfind(b"\n") + 1
+    with open(output_path, "wb") as output_file:
+        output_file.write(content[: last_line_start + 20])
+
+    summary = processor.run(jobs, output_path)
+    assert summary["skipped"] == 4
+    assert summary["ok"] + summary["error"] == 1
+    records = read_records(output_path)
+    assert sorted(record["source"] for record in records) == sorted(
+        job.source for job in jobs
+    )
+
+    assert processor.run(jobs, output_path)["skipped"] == 5
+
+    assert processor.run(jobs, output_path, retry_failed=True) == {
+        "skipped": 4,
+        "ok": 0,
+        "error": 1,
+        "timeout": 0,
+    }
+    errors = [record for record in read_records(output_path) if "error" in record]
+    assert [record["source"] for record in errors] == [
+        str(input_directory / "broken.pdf")
+    ] * 2
+
+
+def test_batch_records_timeouts(tmp_path, statement_template):
+    source = tmp_path / "long.pdf"
+    source.write_bytes(make_statement(pages=40))
+    output_path = str(tmp_path / "results.jsonl")
+    processor = BatchProcessor(
+        {"statement": CompiledTemplate(statement_template)}, workers=1, timeout=0.01
+    )
+
+    summary = processor.run([BatchJob(str(source), "statement")], output_path)
+
+    assert summary["timeout"] == 1
+    (record,) = read_records(output_path)
+    assert record["status"] == "timeout"
+    assert record["error"] == "Parsing took longer than 0.01 seconds"
+    assert "result" not in record
@@ -0,0 +1,42 @@
+import random
+
+import pytest
+from conftest import brute_force_indexes, make_box, make_items
+
+from pdf_parser.coordinate_utils import CoordinateUtils, SpatialIndex
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_spatial_index_matches_brute_force(seed):
+    generator = random.Random(seed)
+    items = make_items(generator, 500)
+    spatial_index = SpatialIndex.from_items(items)
+    coordinate_utils = CoordinateUtils()
+
+    for _ in range(200):
+        x0, y0 = generator.random(), generator.random()
+        box = make_box(x0, y0, x0 + generator.random(), y0 + generator.random() / 4)
+        threshold = generator.choice([0.0, 0.005, 0.02])
+        expected = brute_force_indexes(items, box, threshold)
+
+        assert spatial_index.query(box, threshold).tolist() == expected
+        expected_items = [items[index] for index in expected]
+        assert (
+            CoordinateUtils.get_items_in_bounding_box(items, box, threshold)
+            == expected_items
+        )
+        assert (
+            coordinate_utils.get_indexed_items_in_bounding_box(items, box, threshold)
+            == expected_items
+        )
+
+
+def test_spatial_index_includes_items_on_box_edges():
+    items = [
+        {"bounding_box": {"decimal_coordinates": make_box(0.25, y, 0.5, y + 0.125)}}
+        for y in (0.125, 0.25, 0.25, 0.375)
+    ]
+    box = make_box(0.25, 0.25, 0.5, 0.375)
+
+    assert SpatialIndex.from_items(items).query(box, 0.0).tolist() == [1, 2]
+    assert SpatialIndex.from_items([]).query(box).tolist() == []
@@ -0,0 +1,35 @@
+import os
+import sys
+
+from conftest import make_statement
+
+from pdf_parser.identifier import Fingerprint, TemplateIdentifier
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "benchmarks")
+)
+
+from synthetic import make_pdf  # noqa: E402
+
+
+def test_identifies_other_documents_of_a_registered_layout():
+    identifier = TemplateIdentifier()
+    identifier.register("statement", make_statement(seed=1))
+    identifier.register("synthetic", make_pdf(pages=1, seed=1))
+
+    for seed in range(2, 5):
+        assert identifier.identify(make_statement(seed=seed)) == "statement"
+        assert identifier.identify(make_pdf(pages=1, seed=seed)) == "synthetic"
+
+
+def test_registering_several_samples_keeps_shared_tokens():
+    samples = [
+        Fingerprint.from_pdf_bytes(make_pdf(pages=1, seed=seed)) for seed in (1, 2)
+    ]
+    identifier = TemplateIdentifier()
+    identifier.register("synthetic", *samples)
+
+    assert identifier.fingerprints["synthetic"].tokens == (
+        samples[0].tokens & samples[1].tokens
+    )
+    assert identifier.identify(make_pdf(pages=1, seed=3)) == "synthetic"
@@ -0,0 +1,50 @@
+import io
+import random
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from pdf_parser.extractors import ImageExtractor
+from pdf_parser.raster import PageRaster
+
+
+def make_jpg(mode, seed=0):
+    generator = np.random.default_rng(seed)
+    shape = (423, 297) if mode == "L" else (423, 297, 3)
+    image = Image.fromarray(generator.integers(0, 256, shape, dtype=np.uint8), mode)
+    jpg_file = io.BytesIO()
+    image.save(jpg_file, format="JPEG")
+    return jpg_file.getvalue()
+
+
+def make_coordinates(generator):
+    x0, y0 = generator.uniform(-0.1, 1.1), generator.uniform(-0.1, 1.1)
+    kind = generator.choice(["horizontal", "vertical", "box", "empty"])
+    if kind == "horizontal":
+        x1, y1 = generator.uniform(-0.1, 1.1), y0
+    elif kind == "vertical":
+        x1, y1 = x0, generator.uniform(-0.1, 1.1)
+    elif kind == "box":
+        x1, y1 = x0 + generator.uniform(0, 0.3), y0 + generator.uniform(0, 0.3)
+    else:
+        x1, y1 = x0 - 0.1, y0 - 0.1
+    return {"top_left": {"x": x0, "y": y0}, "bottom_right": {"x": x1, "y": y1}}
+
+
+@pytest.mark.parametrize("mode", ["RGB", "L"])
+def test_average_pixel_values_match_per_line_averages(mode):
+    jpg_bytes = make_jpg(mode)
+    generator = random.Random(0)
+    coordinates_list = [make_coordinates(generator) for _ in range(300)]
+    image_extractor = ImageExtractor(jpg_bytes)
+
+    expected = [
+        image_extractor.calculate_average_pixel_value(jpg_bytes, coordinates)[0]
+        for coordinates in coordinates_list
+    ]
+
+    raster = PageRaster.from_jpg_bytes(jpg_bytes)
+    assert raster.grayscale == (mode == "L")
+    assert raster.average_pixel_values(coordinates_list) == expected
+    assert raster.average_pixel_values([]) == []
@@ -0,0 +1,67 @@
+import asyncio
+from typing import Optional
+
+import pytest
+
+pytest.importorskip("fastapi")
+httpx = pytest.importorskip("httpx")
+
+from pdf_parser.service import create_app  # noqa: E402
+
+
+def post(
+    app, content: Optional[bytes], template_id: str = "statement"
+) -> "httpx.Response":
+    async def send() -> "httpx.Response":
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            return await client.post(
+                "/parse",
+                files={"file": ("statement.pdf", content)} if content else None,
+                data={"template_id": template_id},
+            )
+
+    return asyncio.run(send())
+
+
+def test_full_queue_returns_429(statement_template):
+    app = create_app({"statement": statement_template}, workers=1, max_queue_depth=1)
+    service = app.state.service
+    service.in_flight = 1
+
+    response = post(app, b"%PDF-1.4")
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    assert service.executor is None
+
+
+def test_large_upload_returns_413(statement_template):
+    app = create_app({"statement": statement_template}, max_upload_bytes=100)
+
+    response = post(app, b"x" * 1000)
+
+    assert response.status_code == 413
+    assert app.state.service.in_flight == 0
+
+
+def test_missing_field_and_unknown_template(statement_template):
+    app = create_app({"statement": statement_template})
+
+    assert post(app, None).status_code == 422
+    assert post(app, b"%PDF-1.4", template_id="other").status_code == 404
+    assert app.state.service.in_flight == 0
+
+
+def test_unreadable_pdf_returns_422(statement_template):
+    app = create_app({"statement": statement_template}, workers=1)
+    try:
+        response = post(app, b"not a pdf")
+    finally:
+        app.state.service.close()
+
+    assert response.status_code == 422
+    assert response.json()["detail"].startswith("PdfminerException")
+    assert app.state.service.in_flight == 0
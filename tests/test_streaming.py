@@ -0,0 +1,24 @@
+import tracemalloc
+
+from conftest import make_statement
+
+from pdf_parser.parser import ParserSession
+
+
+def test_iter_pages_memory_stays_bounded(statement_template):
+    pdf_bytes = make_statement(pages=40)
+    session = ParserSession(statement_template)
+
+    tracemalloc.start()
+    try:
+        memory_by_page = []
+        for page in session.iter_pages(pdf_bytes):
+            assert page["tables"][0]["data"]
+            memory_by_page.append(tracemalloc.get_traced_memory()[0])
+    finally:
+        tracemalloc.stop()
+
+    assert len(memory_by_page) == 40
+    # Released pages are freed, so the last pages hold no more than the
+    # early ones, give or take a page's worth of layout objects
+    assert memory_by_page[-1] - memory_by_page[5] < 2_000_000
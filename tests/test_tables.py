@@ -0,0 +1,70 @@
+import random
+
+import pytest
+from conftest import brute_force_indexes, make_box, make_items, make_statement
+
+from pdf_parser.coordinate_utils import SpatialIndex
+from pdf_parser.extractors import DataExtractor
+from pdf_parser.parser import Parser
+from pdf_parser.tables import TableEngine
+
+
+def make_column_boxes(generator, columns):
+    column_boxes = []
+    for _ in range(columns):
+        if generator.random() < 0.1:
+            column_boxes.append([])
+            continue
+        x0 = generator.random()
+        x1 = x0 + generator.random() * 0.3
+        edges = sorted(generator.random() for _ in range(generator.randint(2, 30)))
+        column_boxes.append(
+            [make_box(x0, top, x1, bottom) for top, bottom in zip(edges, edges[1:])]
+        )
+    return column_boxes
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_table_engine_matches_per_cell_queries(seed):
+    generator = random.Random(seed)
+    items = make_items(generator, 400)
+    column_boxes = make_column_boxes(generator, 6)
+    table_engine = TableEngine()
+
+    cell_indexes = table_engine.get_cell_indexes(
+        SpatialIndex.from_items(items), column_boxes
+    )
+
+    assert [
+        [indexes.tolist() for indexes in column_indexes]
+        for column_indexes in cell_indexes
+    ] == [
+        [brute_force_indexes(items, box, table_engine.threshold) for box in boxes]
+        for boxes in column_boxes
+    ]
+
+
+def test_table_texts_match_per_cell_queries(statement_template):
+    pdf_data = DataExtractor(make_statement(pages=2)).extract_data(
+        template=statement_template
+    )
+    parser = Parser()
+
+    for page in pdf_data["pages"]:
+        column_boxes = parser.get_table_column_boxes(
+            "transactions", page, statement_template
+        )
+        expected = [
+            parser.text_extractor.get_text_from_items(
+                [
+                    page["content"][index]
+                    for index in brute_force_indexes(page["content"], box, 0.005)
+                ]
+            )
+            for _, boxes in column_boxes
+            for box in boxes
+        ]
+
+        texts = parser.get_texts_from_column_boxes(page["content"], column_boxes)
+        assert texts == expected
+        assert any(texts)